@@ -0,0 +1,87 @@
+"""
+Compare MTCNN latency and crop IoU at full resolution vs downscaled detection.
+
+Usage (from the Django Application directory):
+    python -m ml_app.benchmarks.detection_resolution video.mp4 --max-sides 480 640 960
+"""
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+from mtcnn import MTCNN
+
+from ml_app.models.frame_sampler import FrameSampler
+from ml_app.models.detection_scaling import (
+    box_iou, downscale_frame, min_face_size_for, pad_box, rescale_detections,
+)
+
+TARGET_SIZE = (128, 128)
+
+
+def detect_crop_boxes(detector, frames, max_side=None, auto_min_face=False):
+    boxes = []
+    start = time.perf_counter()
+    for frame in frames:
+        small, scale = downscale_frame(frame, max_side)
+        if auto_min_face:
+            detector.min_face_size = min_face_size_for(TARGET_SIZE, max_side, max(frame.shape[:2]))
+        results = detector.detect_faces(cv2.cvtColor(small, cv2.COLOR_BGR2RGB))
+        results = rescale_detections(results, scale)
+        boxes.append(pad_box(results[0]['box'], frame.shape) if results else None)
+    elapsed = time.perf_counter() - start
+    return boxes, elapsed
+
+
+def compare(reference, boxes):
+    ious = []
+    missed = extra = 0
+    for ref, box in zip(reference, boxes):
+        if ref is None and box is None:
+            continue
+        if ref is None:
+            extra += 1
+        elif box is None:
+            missed += 1
+        else:
+            ious.append(box_iou(ref, box))
+    return ious, missed, extra
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('video')
+    parser.add_argument('--frames', type=int, default=32)
+    parser.add_argument('--max-sides', type=int, nargs='+', default=[480, 640, 960])
+    parser.add_argument('--auto-min-face', action='store_true',
+                        help="derive MTCNN min_face_size from the crop target size")
+    args = parser.parse_args()
+
+    frames = [frame for _, frame in FrameSampler(num_frames=args.frames).frames(args.video)]
+    if not frames:
+        raise SystemExit(f"No frames could be read from {args.video}")
+    height, width = frames[0].shape[:2]
+    print(f"{len(frames)} frames at {width}x{height}")
+
+    detector = MTCNN()
+    # Warm-up so graph construction isn't billed to the first configuration
+    detector.detect_faces(cv2.cvtColor(frames[0], cv2.COLOR_BGR2RGB))
+
+    reference, full_time = detect_crop_boxes(detector, frames)
+    print(f"{'mode':>12} {'ms/frame':>10} {'speedup':>8} {'mean IoU':>9} {'min IoU':>8} {'missed':>7} {'extra':>6}")
+    print(f"{'full':>12} {1000 * full_time / len(frames):>10.1f} {1.0:>8.2f} {1.0:>9.3f} {1.0:>8.3f} {0:>7} {0:>6}")
+
+    for max_side in args.max_sides:
+        detector = MTCNN()
+        detector.detect_faces(cv2.cvtColor(downscale_frame(frames[0], max_side)[0], cv2.COLOR_BGR2RGB))
+        boxes, elapsed = detect_crop_boxes(detector, frames, max_side, args.auto_min_face)
+        ious, missed, extra = compare(reference, boxes)
+        mean_iou = float(np.mean(ious)) if ious else 0.0
+        min_iou = float(np.min(ious)) if ious else 0.0
+        print(f"{max_side:>12} {1000 * elapsed / len(frames):>10.1f} {full_time / elapsed:>8.2f} "
+              f"{mean_iou:>9.3f} {min_iou:>8.3f} {missed:>7} {extra:>6}")
+
+
+if __name__ == '__main__':
+    main()
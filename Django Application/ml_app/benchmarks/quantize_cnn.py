@@ -0,0 +1,103 @@
+"""
+Convert the face CNN to full-INT8 TFLite and report accuracy/latency vs fp32.
+
+Usage (from the Django Application directory):
+    python -m ml_app.benchmarks.quantize_cnn ml_app/models/cnn_model.h5 faces/ --out ml_app/models/cnn_model.int8.tflite
+
+faces/ holds face crops (any size, resized to 128x128). The first
+--calibration images calibrate the converter; the report covers all of
+them. If faces/ has real/ and fake/ subfolders, accuracy is reported too.
+Serve the result by setting CNN_MODEL_PATH to the .tflite file.
+"""
+
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+import tensorflow as tf
+
+from ml_app.models.tflite_model import TFLiteModel, convert_to_int8
+
+TARGET_SIZE = (128, 128)
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def load_faces(face_dir):
+    """Preprocessed faces (N, 128, 128, 3) and labels (1 fake, 0 real, -1 unknown)."""
+    faces, labels = [], []
+    for root, _, names in sorted(os.walk(face_dir)):
+        parent = os.path.basename(root).lower()
+        label = {'fake': 1, 'real': 0}.get(parent, -1)
+        for name in sorted(names):
+            if not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            face = cv2.imread(os.path.join(root, name))
+            if face is None:
+                continue
+            face = cv2.resize(cv2.cvtColor(face, cv2.COLOR_BGR2RGB), TARGET_SIZE)
+            faces.append(face)
+            labels.append(label)
+    if not faces:
+        raise SystemExit(f"No face images found under {face_dir}")
+    return np.stack(faces).astype(np.float32) / 255.0, np.array(labels)
+
+
+def fake_probabilities(prediction):
+    prediction = np.asarray(prediction)
+    if prediction.ndim > 1 and prediction.shape[1] > 1:
+        return prediction[:, 1]
+    return prediction.reshape(len(prediction), -1)[:, 0]
+
+
+def run(model, faces, batch_size):
+    probabilities = []
+    start = time.perf_counter()
+    for i in range(0, len(faces), batch_size):
+        probabilities.append(fake_probabilities(model.predict(faces[i:i + batch_size], verbose=0)))
+    return np.concatenate(probabilities), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('model')
+    parser.add_argument('faces')
+    parser.add_argument('--out', help="defaults to <model>.int8.tflite")
+    parser.add_argument('--calibration', type=int, default=200, help="faces used as the representative dataset")
+    parser.add_argument('--batch-size', type=int, default=32)
+    args = parser.parse_args()
+    out = args.out or os.path.splitext(args.model)[0] + '.int8.tflite'
+
+    faces, labels = load_faces(args.faces)
+    print(f"{len(faces)} faces, calibrating on {min(args.calibration, len(faces))}")
+
+    fp32 = tf.keras.models.load_model(args.model, compile=False)
+    calibration = np.random.default_rng(0).permutation(len(faces))[:args.calibration]
+    convert_to_int8(fp32, [faces[calibration]], out)
+    int8 = TFLiteModel(out)
+
+    # Warm-up so graph construction isn't billed to either model
+    run(fp32, faces[:1], 1)
+    run(int8, faces[:1], 1)
+    p32, t32 = run(fp32, faces, args.batch_size)
+    p8, t8 = run(int8, faces, args.batch_size)
+
+    delta = np.abs(p32 - p8)
+    agreement = np.mean((p32 >= 0.5) == (p8 >= 0.5))
+    print(f"{'model':>6} {'size MB':>8} {'ms/face':>8}")
+    print(f"{'fp32':>6} {os.path.getsize(args.model) / 2**20:>8.2f} {1000 * t32 / len(faces):>8.2f}")
+    print(f"{'int8':>6} {os.path.getsize(out) / 2**20:>8.2f} {1000 * t8 / len(faces):>8.2f}")
+    print(f"mean |dp| = {delta.mean():.4f}, max |dp| = {delta.max():.4f}, decision agreement = {agreement * 100:.2f}%")
+
+    known = labels >= 0
+    if known.any():
+        acc32 = np.mean((p32[known] >= 0.5) == labels[known])
+        acc8 = np.mean((p8[known] >= 0.5) == labels[known])
+        print(f"accuracy on {known.sum()} labelled faces: fp32 {acc32 * 100:.2f}%, int8 {acc8 * 100:.2f}% "
+              f"(delta {(acc8 - acc32) * 100:+.2f} pts)")
+    print(f"Wrote {out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,345 @@
+"""
+Offline bulk scanning behind ``manage.py scan_media``.
+
+Decoding runs in a pool of spawned worker processes. For videos that is
+frame sampling plus MTCNN face crops, for audio the MFCC windows, and for
+images decode and resize. Each worker keeps one model-less detector per
+media kind. The parent process holds the CNNs and runs them over inputs
+pooled from many files, so every forward pass is full. Results are
+appended to a JSONL log, which is also the checkpoint.
+"""
+
+import csv
+import json
+import multiprocessing
+import os
+import sys
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from .utils import json_default
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.webm', '.m4v', '.mpg', '.mpeg')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tif', '.tiff')
+AUDIO_EXTENSIONS = ('.wav', '.flac', '.ogg', '.mp3', '.m4a', '.aac')
+
+
+def media_kind(path):
+    """'video', 'image' or 'audio' from the file extension, else None."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in VIDEO_EXTENSIONS:
+        return 'video'
+    if extension in IMAGE_EXTENSIONS:
+        return 'image'
+    if extension in AUDIO_EXTENSIONS:
+        return 'audio'
+    return None
+
+
+def iter_directory(root):
+    """Every file under root, in a stable order."""
+    for directory, subdirectories, names in os.walk(root):
+        subdirectories.sort()
+        for name in sorted(names):
+            yield os.path.join(directory, name)
+
+
+def iter_manifest(manifest_path):
+    """Paths listed in a manifest, relative ones resolved against its directory.
+
+    A .csv manifest needs a 'path' column and a .jsonl one a 'path' field.
+    Anything else is read as one path per line; '#' starts a comment line.
+    """
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    with open(manifest_path, newline='', encoding='utf-8') as f:
+        if manifest_path.endswith('.csv'):
+            paths = (row['path'] for row in csv.DictReader(f))
+        elif manifest_path.endswith('.jsonl'):
+            paths = (json.loads(line)['path'] for line in f if line.strip())
+        else:
+            paths = (line.strip() for line in f if not line.startswith('#'))
+        for path in paths:
+            if path:
+                yield os.path.join(base, path)
+
+
+class ResultLog:
+    """Append-only JSONL of scan records, one per file, doubling as the checkpoint.
+
+    Opening an existing log reads back the paths it already covers and cuts
+    off a half-written last line (left by a kill mid-write), so a rerun
+    picks up where the previous one stopped. With retry_errors, files whose
+    record is an error are scanned again; the newest record for a path wins.
+    """
+
+    def __init__(self, path, retry_errors=False):
+        self.path = path
+        self.done = set()
+        self.counts = Counter()
+        if os.path.exists(path):
+            self._recover(retry_errors)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def _recover(self, retry_errors):
+        valid = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                valid += len(line)
+                if retry_errors and 'error' in record:
+                    self.done.discard(record['path'])
+                else:
+                    self.done.add(record['path'])
+        if valid < os.path.getsize(self.path):
+            print(f"Dropping a partial record at the end of {self.path}")
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid)
+
+    def write(self, record):
+        self._file.write(json.dumps(record, default=json_default) + '\n')
+        self.counts['error' if 'error' in record else record.get('result', 'scanned')] += 1
+
+    def flush(self):
+        """Make everything written so far survive a crash."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+
+def export_parquet(log_path, parquet_path, rows_per_group=10000):
+    """Write the newest record per path from a scan log to Parquet (needs pyarrow).
+
+    Columns are path, kind, result, confidence and error, plus a JSON
+    'details' column with the rest of each record.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # Line number of the newest record per path, so reruns don't duplicate rows
+    newest = {}
+    with open(log_path, encoding='utf-8') as f:
+        for number, line in enumerate(f):
+            newest[json.loads(line)['path']] = number
+
+    schema = pa.schema([
+        ('path', pa.string()),
+        ('kind', pa.string()),
+        ('result', pa.string()),
+        ('confidence', pa.float64()),
+        ('error', pa.string()),
+        ('details', pa.string()),
+    ])
+    rows = 0
+    with pq.ParquetWriter(parquet_path, schema) as writer, open(log_path, encoding='utf-8') as f:
+        group = {name: [] for name in schema.names}
+        for number, line in enumerate(f):
+            record = json.loads(line)
+            if newest[record['path']] != number:
+                continue
+            for name in schema.names[:-1]:
+                group[name].append(record.pop(name, None))
+            group['details'].append(json.dumps(record))
+            rows += 1
+            if len(group['path']) == rows_per_group:
+                writer.write_table(pa.table(group, schema=schema))
+                group = {name: [] for name in schema.names}
+        if group['path']:
+            writer.write_table(pa.table(group, schema=schema))
+    return rows
+
+
+# Model-less detectors of the current worker process, built on first use
+_worker_detectors = {}
+_worker_options = {}
+
+
+def _init_worker(options):
+    global _worker_options
+    _worker_options = options
+    if options.get('quiet'):
+        sys.stdout = open(os.devnull, 'w')
+
+    # The pool spreads the work across cores, so each worker stays on one
+    import cv2
+    import tensorflow as tf
+    cv2.setNumThreads(1)
+    tf.config.threading.set_intra_op_parallelism_threads(1)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+def _worker_detector(kind):
+    detector = _worker_detectors.get(kind)
+    if detector is None:
+        options = _worker_options.get(kind, {})
+        if kind == 'video':
+            from .models.detector2 import DeepfakeDetector
+            detector = DeepfakeDetector(model_path=None, pipelined=False, **options)
+        elif kind == 'image':
+            from .models.image_detector import ImageDeepfakeDetector
+            detector = ImageDeepfakeDetector(model_path=None, **options)
+        else:
+            from .models.audio_detector import AudioDeepfakeDetector
+            detector = AudioDeepfakeDetector(model_path=None, **options)
+        _worker_detectors[kind] = detector
+    return detector
+
+
+def decode_media(kind, path):
+    """Model inputs for one file plus what is needed to build its result (runs in a worker)."""
+    detector = _worker_detector(kind)
+    if kind == 'video':
+        frames = detector.extract_frames(path, detector.max_frames)
+        if len(frames) == 0:
+            raise ValueError("No frames could be extracted from the video")
+        context = detector.collect_faces(frames)
+        return np.stack(context.pop('faces')), context
+    if kind == 'image':
+        with open(path, 'rb') as f:
+            image, processed = detector.prepare(f.read())
+        return processed[np.newaxis], {'image_shape': image.shape}
+    windows = list(detector.iter_windows(detector.iter_audio(path)))
+    return np.stack(windows), {'duration': detector.audio_duration(path, len(windows))}
+
+
+class BulkScanner:
+    """Feeds files through the decode pool and the parent's detectors.
+
+    ``detectors`` maps media kind to a detector with its model loaded.
+    ``worker_options`` maps media kind to the constructor kwargs of the
+    workers' model-less detectors (plus 'quiet'). Decoded inputs wait per
+    kind until ``batch_size`` of them (faces, images or MFCC windows) are
+    pending, then go through the model together.
+    """
+
+    def __init__(self, detectors, worker_options, workers=None, batch_size=256):
+        self.detectors = detectors
+        self.worker_options = worker_options
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        # Enough queued decodes to keep every worker busy while the model runs
+        self.max_in_flight = self.workers * 2
+
+    def _new_pool(self):
+        # spawn, not fork: TensorFlow state does not survive a fork
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(self.worker_options,),
+        )
+
+    def run(self, paths, log, progress=None):
+        """Scan (kind, path) pairs, writing one record per file to log.
+
+        A decoder that crashes its worker process breaks the whole pool and
+        fails every file in flight. Those files become suspects and are
+        retried one at a time on a fresh pool. Only a file that crashes a
+        worker on its own is logged as an error; the rest are scanned
+        normally.
+        """
+        pending = {kind: [] for kind in self.detectors}
+        in_flight = {}
+        suspects = deque()
+        isolated = None
+        paths = iter(paths)
+        exhausted = False
+        pool = self._new_pool()
+        try:
+            while True:
+                if suspects:
+                    if not in_flight:
+                        isolated = suspects.popleft()
+                        in_flight[pool.submit(decode_media, *isolated)] = isolated
+                else:
+                    while not exhausted and len(in_flight) < self.max_in_flight:
+                        item = next(paths, None)
+                        if item is None:
+                            exhausted = True
+                            break
+                        in_flight[pool.submit(decode_media, *item)] = item
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                broken = False
+                for future in done:
+                    item = in_flight.pop(future)
+                    kind, path = item
+                    try:
+                        inputs, context = future.result()
+                    except BrokenProcessPool:
+                        broken = True
+                        if item is isolated:
+                            log.write({'path': path, 'kind': kind, 'error': 'Decode worker crashed'})
+                        else:
+                            suspects.append(item)
+                        continue
+                    except Exception as e:
+                        log.write({'path': path, 'kind': kind, 'error': str(e) or type(e).__name__})
+                        continue
+                    finally:
+                        if item is isolated:
+                            isolated = None
+                    pending[kind].append((path, inputs, context))
+                    if sum(len(inputs) for _, inputs, _ in pending[kind]) >= self.batch_size:
+                        self.flush(kind, pending[kind], log)
+                        pending[kind] = []
+                        if progress is not None:
+                            progress(log.counts)
+                if broken:
+                    # Everything else that was on the dead pool failed with it
+                    suspects.extend(in_flight.values())
+                    in_flight.clear()
+                    pool.shutdown(wait=False)
+                    pool = self._new_pool()
+
+            for kind, items in pending.items():
+                self.flush(kind, items, log)
+            if progress is not None:
+                progress(log.counts)
+        finally:
+            # Unscanned files (suspects included) are not in the log, so a rerun picks them up
+            for future in in_flight:
+                future.cancel()
+            pool.shutdown(wait=False)
+            log.flush()
+
+    def flush(self, kind, items, log):
+        """One model pass over the pooled inputs of items, then a record per file."""
+        if not items:
+            return
+        detector = self.detectors[kind]
+        inputs = np.concatenate([inputs for _, inputs, _ in items])
+        if kind == 'video':
+            probabilities = detector.predict_faces(inputs)
+        elif kind == 'image':
+            probabilities = detector.predict_batch(inputs)
+        else:
+            probabilities = detector.predict_windows(inputs)
+
+        offset = 0
+        for path, inputs, context in items:
+            scores = probabilities[offset:offset + len(inputs)]
+            offset += len(inputs)
+            try:
+                if kind == 'video':
+                    result = detector.score_faces(context, scores)
+                elif kind == 'image':
+                    result = detector.describe(context['image_shape'], scores[0])
+                else:
+                    result = detector.summarize(scores, context['duration'], (detector.n_mfcc, detector.max_length, 1))
+            except Exception as e:
+                result = {'error': str(e) or type(e).__name__}
+            log.write({'path': path, 'kind': kind, **result})
+        log.flush()
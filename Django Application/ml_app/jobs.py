@@ -0,0 +1,224 @@
+import json
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from .utils import json_default
+
+
+class Job:
+    def __init__(self, kind, on_change=None, save_interval=0.5):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = 'queued'
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.updated = self.created
+        self._lock = threading.Lock()
+        # Called with the job to persist it: on every status change, but for
+        # progress at most every save_interval seconds (plus each stage's
+        # first and last tick). self.progress itself is always live
+        self._on_change = on_change
+        self.save_interval = save_interval
+        self._saved = 0.0
+
+    def report(self, stage, done, total=None):
+        """Progress callback handed to the detectors."""
+        with self._lock:
+            new_stage = stage not in self.progress
+            self.progress[stage] = {'done': done, 'total': total}
+            self.updated = time.time()
+            due = new_stage or done == total or self.updated - self._saved >= self.save_interval
+            if due:
+                self._saved = self.updated
+        if due:
+            self._changed()
+
+    def _set(self, **fields):
+        with self._lock:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self.updated = self._saved = time.time()
+        self._changed()
+
+    def _changed(self):
+        if self._on_change is not None:
+            self._on_change(self)
+
+    def to_dict(self):
+        with self._lock:
+            data = {
+                'job_id': self.id,
+                'kind': self.kind,
+                'status': self.status,
+                'progress': {stage: dict(value) for stage, value in self.progress.items()},
+                'created': self.created,
+                'updated': self.updated,
+            }
+            if self.status == 'completed':
+                data['result'] = self.result
+            elif self.status == 'failed':
+                data['error'] = self.error
+            return data
+
+
+class StoredJob:
+    """Read-only snapshot of a job loaded from the shared table."""
+
+    def __init__(self, data):
+        self.id = data['job_id']
+        self.status = data['status']
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+class JobManager:
+    """Runs analyses on a local thread pool and keeps their state for polling.
+
+    With ``db_path`` every status change, and progress at most every half
+    second, is also written to a sqlite table (the result cache's file), so
+    a poll that lands on another server worker still finds the job.
+    Finished jobs are kept for ``retention`` seconds so clients can fetch
+    the result, then dropped the next time a job is submitted. Stored jobs
+    still queued or running with no update for ``stale_after`` seconds
+    belonged to a worker that died; they are marked failed on startup and
+    whenever a job is submitted.
+    """
+
+    def __init__(self, workers=2, retention=3600, db_path=None, stale_after=900):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='analysis-job')
+        self.retention = retention
+        self.stale_after = stale_after
+        self.db_path = db_path
+        self.jobs = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        if db_path is not None:
+            connection = self._connection()
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS analysis_jobs ('
+                ' id TEXT PRIMARY KEY,'
+                ' status TEXT NOT NULL,'
+                ' data TEXT NOT NULL,'
+                ' updated REAL NOT NULL)'
+            )
+            connection.commit()
+            self._fail_stale(connection)
+
+    def _connection(self):
+        # sqlite connections can't be shared across threads
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=5)
+            self._local.connection = connection
+        return connection
+
+    def _save(self, job):
+        if self.db_path is None:
+            return
+        data = job.to_dict()
+        try:
+            connection = self._connection()
+            connection.execute(
+                'INSERT OR REPLACE INTO analysis_jobs (id, status, data, updated) VALUES (?, ?, ?, ?)',
+                (job.id, data['status'], json.dumps(data, default=json_default), data['updated']),
+            )
+            connection.commit()
+        except sqlite3.Error as e:
+            print(f"Error saving job {job.id}: {str(e)}")
+
+    def _load(self, job_id):
+        if self.db_path is None:
+            return None
+        try:
+            row = self._connection().execute('SELECT data FROM analysis_jobs WHERE id = ?', (job_id,)).fetchone()
+        except sqlite3.Error as e:
+            print(f"Error loading job {job_id}: {str(e)}")
+            return None
+        return StoredJob(json.loads(row[0])) if row is not None else None
+
+    def submit(self, kind, fn, *args, cleanup=None):
+        """Queue fn(*args, progress=job.report); cleanup() runs once it finishes."""
+        job = Job(kind, on_change=self._save)
+        with self._lock:
+            self._expire()
+            self.jobs[job.id] = job
+        self._save(job)
+        self.executor.submit(self._run, job, fn, args, cleanup)
+        return job
+
+    def completed(self, kind, result):
+        """Record a job whose result is already known (e.g. a cache hit)."""
+        job = Job(kind, on_change=self._save)
+        job._set(status='completed', result=result)
+        with self._lock:
+            self._expire()
+            self.jobs[job.id] = job
+        return job
+
+    def get(self, job_id):
+        """The job, whichever server worker runs it; None if unknown or expired."""
+        with self._lock:
+            job = self.jobs.get(job_id)
+        return job if job is not None else self._load(job_id)
+
+    def _run(self, job, fn, args, cleanup):
+        job._set(status='running')
+        try:
+            result = fn(*args, progress=job.report)
+            job._set(status='completed', result=result)
+        except Exception as e:
+            print(f"Error in {job.kind} job {job.id}: {str(e)}")
+            print(traceback.format_exc())
+            job._set(status='failed', error=str(e))
+        finally:
+            if cleanup is not None:
+                cleanup()
+
+    def _expire(self):
+        cutoff = time.time() - self.retention
+        for job_id in [job_id for job_id, job in self.jobs.items()
+                       if job.status in ('completed', 'failed') and job.updated < cutoff]:
+            del self.jobs[job_id]
+        if self.db_path is not None:
+            try:
+                connection = self._connection()
+                connection.execute(
+                    "DELETE FROM analysis_jobs WHERE status IN ('completed', 'failed') AND updated < ?", (cutoff,)
+                )
+                connection.commit()
+                self._fail_stale(connection)
+            except sqlite3.Error as e:
+                print(f"Error expiring jobs: {str(e)}")
+
+    def _fail_stale(self, connection):
+        cutoff = time.time() - self.stale_after
+        rows = connection.execute(
+            "SELECT id, data FROM analysis_jobs WHERE status IN ('queued', 'running') AND updated < ?", (cutoff,)
+        ).fetchall()
+        now = time.time()
+        for job_id, data in rows:
+            if job_id in self.jobs:
+                # Ours and still alive, just quiet
+                continue
+            data = json.loads(data)
+            data.update(status='failed', error='Analysis was interrupted (server worker stopped)', updated=now)
+            # Unless its worker saved it again in the meantime
+            connection.execute(
+                "UPDATE analysis_jobs SET status = 'failed', data = ?, updated = ? WHERE id = ? AND updated < ?",
+                (json.dumps(data), now, job_id, cutoff),
+            )
+        connection.commit()
+
+    def stats(self):
+        with self._lock:
+            statuses = [job.status for job in self.jobs.values()]
+        return {status: statuses.count(status) for status in ('queued', 'running', 'completed', 'failed')}
@@ -0,0 +1,108 @@
+import os
+import time
+from contextlib import ExitStack, redirect_stdout
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ml_app.bulk_scan import BulkScanner, ResultLog, export_parquet, iter_directory, iter_manifest, media_kind
+
+
+class Command(BaseCommand):
+    help = (
+        "Scan a directory tree or a manifest of media files for deepfakes. "
+        "Results are appended to a JSONL log; rerunning with the same --output "
+        "skips files already in it, so an interrupted scan resumes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help="Directory to walk, or a manifest (.txt, .csv or .jsonl with a 'path' field)")
+        parser.add_argument('--output', default='scan_results.jsonl', help="JSONL result log and checkpoint")
+        parser.add_argument('--parquet', help="Also write the results to this Parquet file when the scan finishes (needs pyarrow)")
+        parser.add_argument('--kinds', default='video,image,audio', help="Comma-separated media kinds to scan")
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Decode worker processes")
+        parser.add_argument('--batch-size', type=int, default=256,
+                            help="Faces, images or audio windows pooled across files per model pass")
+        parser.add_argument('--retry-errors', action='store_true', help="Scan again files whose last record is an error")
+
+    def handle(self, *args, **options):
+        source = options['source']
+        if not os.path.exists(source):
+            raise CommandError(f"{source} does not exist")
+        if options['parquet']:
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise CommandError("--parquet needs pyarrow (pip install pyarrow)")
+
+        kinds = {kind.strip() for kind in options['kinds'].split(',') if kind.strip()}
+        unknown = kinds - {'video', 'image', 'audio'}
+        if unknown:
+            raise CommandError(f"Unknown media kinds: {', '.join(sorted(unknown))}")
+        if 'audio' in kinds and not settings.AUDIO_MODEL_PATH:
+            self.stderr.write("AUDIO_MODEL_PATH is not set; skipping audio files")
+            kinds.discard('audio')
+
+        quiet = options['verbosity'] < 2
+        worker_options = {
+            'quiet': quiet,
+            'video': {
+                'detection_max_side': settings.FACE_DETECTION_MAX_SIDE,
+                'min_face_size': settings.FACE_DETECTION_MIN_FACE_SIZE,
+                'track_interval': settings.FACE_TRACK_INTERVAL,
+                'frame_dedup_distance': settings.FRAME_DEDUP_DISTANCE,
+            },
+        }
+        with ExitStack() as stack:
+            if quiet:
+                # The detectors print per file; keep the output to progress lines
+                stack.enter_context(redirect_stdout(stack.enter_context(open(os.devnull, 'w'))))
+            detectors = self.load_detectors(kinds, worker_options)
+            self.scan(source, detectors, worker_options, kinds, options)
+
+        if options['parquet']:
+            rows = export_parquet(options['output'], options['parquet'])
+            self.stdout.write(f"Wrote {rows} rows to {options['parquet']}")
+
+    def scan(self, source, detectors, worker_options, kinds, options):
+        log = ResultLog(options['output'], retry_errors=options['retry_errors'])
+        if log.done:
+            self.stdout.write(f"Resuming: {len(log.done)} files already in {options['output']}")
+        paths = iter_directory(source) if os.path.isdir(source) else iter_manifest(source)
+        pending = ((media_kind(path), path) for path in paths if path not in log.done)
+        pending = ((kind, path) for kind, path in pending if kind in kinds)
+
+        start = time.perf_counter()
+
+        def progress(counts):
+            scanned = sum(counts.values())
+            summary = ', '.join(f"{name} {count}" for name, count in sorted(counts.items()))
+            self.stdout.write(f"{scanned} files ({summary}), {scanned / (time.perf_counter() - start):.1f} files/s")
+
+        scanner = BulkScanner(detectors, worker_options, workers=options['workers'], batch_size=options['batch_size'])
+        try:
+            scanner.run(pending, log, progress)
+        except KeyboardInterrupt:
+            self.stderr.write(f"Interrupted; rerun with --output {options['output']} to resume")
+            raise
+        finally:
+            log.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {sum(log.counts.values())} files in {time.perf_counter() - start:.1f}s; results in {options['output']}"
+        ))
+
+    def load_detectors(self, kinds, worker_options):
+        """Detectors that run the models in this process; decoding happens in the workers."""
+        detectors = {}
+        if 'video' in kinds:
+            from ml_app.models.detector2 import DeepfakeDetector
+            detectors['video'] = DeepfakeDetector(model_path=settings.CNN_MODEL_PATH, pipelined=False,
+                                                  **worker_options['video'])
+        if 'image' in kinds:
+            from ml_app.models.image_detector import ImageDeepfakeDetector
+            detectors['image'] = ImageDeepfakeDetector(model_path=settings.CNN_MODEL_PATH)
+        if 'audio' in kinds:
+            from ml_app.models.audio_detector import AudioDeepfakeDetector
+            detectors['audio'] = AudioDeepfakeDetector(model_path=settings.AUDIO_MODEL_PATH)
+        return detectors
@@ -1,17 +1,34 @@
-import os
+import time
 import librosa
 import numpy as np
 import soundfile as sf
-from tensorflow.keras.models import load_model
+from .audio_stream import iter_audio_blocks
+from .model_registry import registry
+
+# librosa's MFCC defaults
+N_FFT = 2048
+HOP_LENGTH = 512
 
 class AudioDeepfakeDetector:
-    def __init__(self, model_path='C:/Users/rajes/Downloads/my_model.h5'):
+    def __init__(self, model_path='C:/Users/rajes/Downloads/my_model.h5', max_batch_size=32, window_hop=None,
+                 min_window_frames=None):
         print("Initializing Audio Deepfake Detector...")
         try:
-            self.model = self.load_model(model_path)
+            self.model_path = model_path
+            # model_path=None gives a feature-only detector (scan_media workers)
+            self.model = self.load_model(model_path) if model_path else None
             self.target_sr = 16000
             self.n_mfcc = 40  # Changed to match original code
             self.max_length = 500  # Changed to match original code
+            # MFCC frames between window starts; defaults to back-to-back windows
+            self.window_hop = window_hop or self.max_length
+            # A trailing window with fewer valid (unpadded) MFCC frames than
+            # this is mostly zero padding and is not scored, unless it is the
+            # only window
+            self.min_window_frames = min_window_frames or self.max_length // 4
+            # Windows per forward pass
+            self.max_batch_size = max_batch_size
+            self.threshold = 0.6
             print("Audio detector initialized successfully")
         except Exception as e:
             print(f"Error initializing audio detector: {str(e)}")
@@ -19,11 +36,8 @@ class AudioDeepfakeDetector:
 
     def load_model(self, model_path):
         try:
-            if not os.path.exists(model_path):
-                raise FileNotFoundError(f"Model file not found at {model_path}")
-
             print(f"Loading model from {model_path}")
-            model = load_model(model_path, compile=False)
+            model = registry.get(model_path)
             print("Model loaded successfully")
             return model
 
@@ -31,57 +45,154 @@ class AudioDeepfakeDetector:
             print(f"Error loading model: {str(e)}")
             raise
 
+    def cache_params(self):
+        """Settings that change the result for a given recording, for result caching."""
+        return {'max_length': self.max_length, 'window_hop': self.window_hop,
+                'min_window_frames': self.min_window_frames, 'threshold': self.threshold}
+
+    def warm_up(self):
+        self.model.predict(np.zeros((1, self.n_mfcc, self.max_length, 1), dtype=np.float32), verbose=0)
+        print("Audio model warm-up complete")
+
+    def iter_audio(self, audio_file_path):
+        """Mono blocks at target_sr, streamed from disk with constant memory."""
+        try:
+            sf.info(audio_file_path)
+        except Exception as e:
+            print(f"Error loading audio file with soundfile: {e}")
+            # Fallback to librosa load (whole file) for formats soundfile can't stream
+            audio, _ = librosa.load(audio_file_path, sr=self.target_sr)
+            return iter([audio])
+        return iter_audio_blocks(audio_file_path, self.target_sr)
+
+    def window_mfcc(self, segment, frames=None):
+        """(n_mfcc, max_length, 1) features for one window's worth of samples.
+
+        segment already carries the n_fft // 2 margin that center=True would
+        add, so frames line up with MFCCs of the whole recording. The last
+        window keeps only its `frames` valid frames and is zero-padded.
+        """
+        mfccs = librosa.feature.mfcc(y=segment, sr=self.target_sr, n_mfcc=self.n_mfcc,
+                                     n_fft=N_FFT, hop_length=HOP_LENGTH, center=False)
+        mfccs = mfccs[:, :self.max_length if frames is None else frames]
+        if mfccs.shape[1] < self.max_length:
+            mfccs = np.pad(mfccs, ((0, 0), (0, self.max_length - mfccs.shape[1])), mode='constant')
+        return mfccs[..., np.newaxis].astype(np.float32)
+
+    def iter_windows(self, blocks):
+        """Yield model-ready MFCC windows as soon as their samples have been decoded.
+
+        Only the samples of the window being filled are buffered. Windows
+        start every window_hop MFCC frames, and the last partial window is
+        zero-padded, so a short clip is handled exactly as before. Trailing
+        windows with fewer than min_window_frames valid frames are dropped
+        when an earlier window exists.
+        """
+        margin = N_FFT // 2
+        window_samples = (self.max_length - 1) * HOP_LENGTH + 2 * margin
+        step = self.window_hop * HOP_LENGTH
+        # Leading zeros stand in for center=True padding
+        buffer = np.zeros(margin, dtype=np.float32)
+        total = 0
+        count = 0
+        for block in blocks:
+            total += len(block)
+            buffer = np.concatenate([buffer, block.astype(np.float32, copy=False)])
+            while len(buffer) >= window_samples:
+                yield self.window_mfcc(buffer[:window_samples])
+                buffer = buffer[step:]
+                count += 1
+
+        # Windows still owed: MFCC frames of the whole recording, then windows over them
+        frames = 1 + total // HOP_LENGTH
+        windows = max(1, -(-max(frames - self.max_length, 0) // self.window_hop) + 1)
+        buffer = np.concatenate([buffer, np.zeros(margin, dtype=np.float32)])
+        for index in range(count, windows):
+            valid = frames - index * self.window_hop
+            if index > 0 and valid < self.min_window_frames:
+                # Later windows only hold fewer valid frames
+                break
+            segment = buffer[:window_samples]
+            if len(segment) < N_FFT:
+                segment = np.pad(segment, (0, N_FFT - len(segment)))
+            yield self.window_mfcc(segment, frames=min(valid, self.max_length))
+            buffer = buffer[step:]
+
+    def predict_windows(self, features):
+        """One batched forward pass per max_batch_size windows; returns fake probabilities."""
+        prediction = self.model.predict(features, batch_size=self.max_batch_size, verbose=0)
+        return np.asarray(prediction).reshape(len(features), -1)[:, 0]
+
     def predict(self, audio_file_path):
         try:
             print(f"Starting audio analysis for {audio_file_path}")
-            
-            # Load the audio file using soundfile
-            try:
-                audio, sr = sf.read(audio_file_path)
-                if sr != self.target_sr:
-                    audio = librosa.resample(audio, orig_sr=sr, target_sr=self.target_sr)
-                    sr = self.target_sr
-            except Exception as e:
-                print(f"Error loading audio file with soundfile: {e}")
-                # Fallback to librosa load
-                audio, sr = librosa.load(audio_file_path, sr=self.target_sr)
-            
-            # Extract features (using MFCC exactly as in original code)
-            mfccs = librosa.feature.mfcc(y=audio, sr=self.target_sr, n_mfcc=self.n_mfcc)
-            
-            # Pad or trim to fixed length (exactly as in original code)
-            if mfccs.shape[1] < self.max_length:
-                mfccs = np.pad(mfccs, ((0, 0), (0, self.max_length - mfccs.shape[1])), mode='constant')
-            else:
-                mfccs = mfccs[:, :self.max_length]
-            
-            # Reshape for model input (exactly as in original code)
-            features = mfccs.reshape(1, self.n_mfcc, self.max_length, 1)
-            
-            # Print shape for debugging
-            print(f"Input shape: {features.shape}")
-            
-            # Predict using the model
-            prediction = self.model.predict(features, verbose=0)
-            
-            # Determine result using same threshold as original code
-            is_fake = bool(prediction[0][0] > 0.6)
-            confidence = float(prediction[0][0] if is_fake else 1 - prediction[0][0]) * 100
-
-            # Get audio duration
-            duration = len(audio) / self.target_sr
-
-            result = {
-                'result': 'FAKE' if is_fake else 'REAL',
-                'confidence': confidence,
-                'duration': duration,
-                'sample_rate': self.target_sr,
-                'input_shape': features.shape[1:].tolist()
-            }
+            start = time.perf_counter()
+            first_window = None
+
+            # Windows go to the model in batches while the rest is still decoding;
+            # the first one is sent alone so its score comes back quickly
+            probabilities = []
+            batch = []
+            for features in self.iter_windows(self.iter_audio(audio_file_path)):
+                batch.append(features)
+                if first_window is None or len(batch) == self.max_batch_size:
+                    probabilities.extend(self.predict_windows(np.stack(batch)))
+                    batch = []
+                    if first_window is None:
+                        first_window = time.perf_counter() - start
+            if batch:
+                probabilities.extend(self.predict_windows(np.stack(batch)))
 
-            print(f"Audio analysis complete. Result: {result['result']} with {result['confidence']:.2f}% confidence")
+            duration = self.audio_duration(audio_file_path, len(probabilities))
+            result = self.summarize(np.array(probabilities), duration, (self.n_mfcc, self.max_length, 1))
+            result['timings'] = {
+                'first_window_seconds': round(first_window, 3),
+                'total_seconds': round(time.perf_counter() - start, 3),
+            }
             return result
 
         except Exception as e:
             print(f"Error analyzing audio: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    def audio_duration(self, audio_file_path, windows):
+        try:
+            return sf.info(audio_file_path).duration
+        except Exception:
+            # Decoded by librosa: approximate from the windows we produced
+            return windows * self.window_hop * HOP_LENGTH / self.target_sr
+
+    def summarize(self, probabilities, duration, input_shape):
+        hop_seconds = HOP_LENGTH / self.target_sr
+        windows = []
+        for i, probability in enumerate(probabilities):
+            start = i * self.window_hop * hop_seconds
+            windows.append({
+                'start': round(start, 3),
+                'end': round(min(start + self.max_length * hop_seconds, duration), 3),
+                'probability': float(probability),
+                'result': 'FAKE' if probability > self.threshold else 'REAL',
+            })
+
+        # Determine result using same threshold as original code, on the mean window score
+        mean_probability = float(np.mean(probabilities)) if len(probabilities) else 0.0
+        is_fake = mean_probability > self.threshold
+        confidence = (mean_probability if is_fake else 1 - mean_probability) * 100
+
+        result = {
+            'result': 'FAKE' if is_fake else 'REAL',
+            'confidence': confidence,
+            'duration': duration,
+            'sample_rate': self.target_sr,
+            'input_shape': list(input_shape),
+            'windows': windows,
+            'aggregate': {
+                'mean_probability': mean_probability,
+                'max_probability': float(np.max(probabilities)) if len(probabilities) else 0.0,
+                'fake_windows': sum(window['result'] == 'FAKE' for window in windows),
+                'total_windows': len(windows),
+            },
+        }
+
+        print(f"Audio analysis complete. Result: {result['result']} with {result['confidence']:.2f}% confidence")
+        return result
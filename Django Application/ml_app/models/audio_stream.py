@@ -0,0 +1,65 @@
+from math import gcd
+
+import numpy as np
+import soundfile as sf
+from scipy.signal import resample_poly
+
+
+class StreamingResampler:
+    """Polyphase resampling (scipy's resample_poly) of audio arriving in blocks.
+
+    Each call resamples the new samples together with ``context`` samples
+    of history and lookahead and keeps only the output whose filter support
+    lies inside what has been seen. Block boundaries leave no seams: the
+    concatenated output matches resampling the whole signal at once. Memory
+    is one block plus the context, however long the stream.
+    """
+
+    def __init__(self, orig_sr, target_sr):
+        divisor = gcd(int(orig_sr), int(target_sr))
+        self.up = int(target_sr) // divisor
+        self.down = int(orig_sr) // divisor
+        # resample_poly's filter spans 10 * max(up, down) upsampled samples each
+        # side; round the matching input span up to whole output steps
+        reach = 10 * max(self.up, self.down) // self.up + 2
+        self.context = -(-reach // self.down) * self.down
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._start = 0     # input position of _buffer[0]
+        self._emitted = 0   # input position up to which output was produced
+
+    def _resample(self, begin, end=None):
+        output = resample_poly(self._buffer, self.up, self.down).astype(np.float32, copy=False)
+        first = (begin - self._start) * self.up // self.down
+        last = None if end is None else (end - self._start) * self.up // self.down
+        return output[first:last]
+
+    def process(self, block):
+        self._buffer = np.concatenate([self._buffer, block.astype(np.float32, copy=False)])
+        available = self._start + len(self._buffer)
+        # Outputs up to `ready` have all their input support in the buffer
+        ready = (available - self.context) // self.down * self.down
+        if ready <= self._emitted:
+            return np.zeros(0, dtype=np.float32)
+
+        output = self._resample(self._emitted, ready)
+        self._emitted = ready
+        keep_from = max(0, ready - self.context)
+        self._buffer = self._buffer[keep_from - self._start:]
+        self._start = keep_from
+        return output
+
+    def flush(self):
+        output = self._resample(self._emitted)
+        self._buffer = np.zeros(0, dtype=np.float32)
+        return output
+
+
+def iter_audio_blocks(path, target_sr, blocksize=65536):
+    """Decode path block by block as mono float32 at target_sr."""
+    info = sf.info(path)
+    resampler = StreamingResampler(info.samplerate, target_sr) if info.samplerate != target_sr else None
+    for block in sf.blocks(path, blocksize=blocksize, dtype='float32', always_2d=True):
+        mono = block.mean(axis=1)
+        yield resampler.process(mono) if resampler else mono
+    if resampler:
+        yield resampler.flush()
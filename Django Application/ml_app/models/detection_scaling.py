@@ -0,0 +1,77 @@
+import cv2
+
+# MTCNN's P-Net works on 12x12 windows, so smaller faces can never be found
+MTCNN_MIN_FACE_SIZE = 12
+
+
+def downscale_frame(frame, max_side):
+    """Shrink frame so its longest side is at most max_side; returns (frame, scale)."""
+    if not max_side:
+        return frame, 1.0
+    height, width = frame.shape[:2]
+    longest = max(height, width)
+    if longest <= max_side:
+        return frame, 1.0
+    scale = max_side / float(longest)
+    size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+    return cv2.resize(frame, size, interpolation=cv2.INTER_AREA), scale
+
+
+def rescale_detections(results, scale):
+    """Map MTCNN boxes and keypoints from the downscaled frame back to full resolution."""
+    if scale == 1.0 or not results:
+        return results
+
+    rescaled = []
+    for result in results:
+        x, y, width, height = result['box']
+        result = dict(result)
+        result['box'] = [
+            int(round(x / scale)),
+            int(round(y / scale)),
+            int(round(width / scale)),
+            int(round(height / scale)),
+        ]
+        if 'keypoints' in result:
+            result['keypoints'] = {
+                name: (int(round(px / scale)), int(round(py / scale)))
+                for name, (px, py) in result['keypoints'].items()
+            }
+        rescaled.append(result)
+    return rescaled
+
+
+def min_face_size_for(target_size, max_side, frame_side):
+    """MTCNN min_face_size that skips faces too small to be worth a target_size crop.
+
+    A face under half the model input size at full resolution would be
+    upscaled more than 2x, so there is no point searching for it. The
+    threshold is expressed in detection-resolution pixels.
+    """
+    min_face = min(target_size) / 2.0
+    if max_side and frame_side > max_side:
+        min_face *= max_side / float(frame_side)
+    return max(MTCNN_MIN_FACE_SIZE, int(min_face))
+
+
+def pad_box(box, frame_shape):
+    """Grow an MTCNN box by 10% of its short side, clipped to the frame."""
+    x, y, width, height = box
+    # Add padding to the bounding box
+    padding = int(min(width, height) * 0.1)
+    x = max(0, x - padding)
+    y = max(0, y - padding)
+    width = min(frame_shape[1] - x, width + 2*padding)
+    height = min(frame_shape[0] - y, height + 2*padding)
+    return x, y, width, height
+
+
+def box_iou(box_a, box_b):
+    """Intersection over union of two (x, y, width, height) boxes."""
+    ax, ay, aw, ah = box_a
+    bx, by, bw, bh = box_b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    intersection = ix * iy
+    union = aw * ah + bw * bh - intersection
+    return intersection / union if union > 0 else 0.0
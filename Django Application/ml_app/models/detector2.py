@@ -1,26 +1,83 @@
-import os
+import threading
+from itertools import islice
 import numpy as np
-from tensorflow.keras.preprocessing import image
-from tensorflow.keras.models import load_model
 import cv2
 from mtcnn import MTCNN
 from pathlib import Path
+from .frame_sampler import FrameSampler
+from .detection_scaling import downscale_frame, rescale_detections, min_face_size_for, pad_box
+from .face_tracker import FaceTracker
+from .video_pipeline import VideoPipeline
+from .identity_tracks import TrackLinker
+from .sequential_verdict import SequentialVerdict
+from .perceptual_hash import FrameDeduplicator
+from .model_registry import registry
 
 class DeepfakeDetector:
-    def __init__(self, model_path='C:/tmp/deep/Django Application/ml_app/models/cnn_model.h5'):
+    def __init__(self, model_path='C:/tmp/deep/Django Application/ml_app/models/cnn_model.h5', max_batch_size=32, pipelined=True, queue_size=8, detection_max_side=None, min_face_size=None, track_interval=1, track_min_score=0.6, multi_face=False, face_min_confidence=0.9, face_min_side=40, frame_dedup_distance=0):
         print("Initializing Deepfake Detector...")
         self.model_path = model_path
-        self.model = self.load_model()
-        self.detector = MTCNN()
+        # model_path=None gives a detector that only decodes and crops
+        # (the scan_media decode workers); the CNN runs elsewhere
+        self.model = self.load_model() if model_path else None
         self.target_size = (128, 128)
+        # Longest side MTCNN sees; frames above it are downscaled for detection
+        # and the boxes are mapped back to full resolution for cropping
+        self.detection_max_side = detection_max_side
+        # None keeps MTCNN's default, 'auto' derives it from target_size
+        self.min_face_size = min_face_size
+        self.detector = MTCNN(min_face_size=min_face_size) if isinstance(min_face_size, int) else MTCNN()
+        self._detect_lock = threading.Lock()
+        # Frames sampled per video
+        self.max_frames = 32
+        # Upper bound on faces sent to the model in a single forward pass
+        self.max_batch_size = max_batch_size
+        # Optional shared InferenceScheduler; when set, faces are queued and
+        # batched together with other requests instead of run locally
+        self.scheduler = None
+        # Run predict() as overlapping decode -> detect -> infer stages
+        self.pipelined = pipelined
+        self.queue_size = queue_size
+        # Optional FaceDetectionPool running MTCNN across processes
+        self.face_pool = None
+        # Full MTCNN detection every track_interval frames (1 = every frame);
+        # in between the face box is carried forward by template matching
+        self.track_interval = track_interval
+        self.track_min_score = track_min_score
+        # Analyze every face above face_min_confidence / face_min_side pixels
+        # and score them per identity track, instead of only the first face
+        self.multi_face = multi_face
+        self.face_min_confidence = face_min_confidence
+        self.face_min_side = face_min_side
+        # Sampled frames within this many dHash bits of an already-scored
+        # frame reuse its score (0 disables, the default)
+        self.frame_dedup_distance = frame_dedup_distance
+        # Adaptive mode: frames are sampled coarse to fine in groups and
+        # scoring stops once a sequential test settles the verdict
+        self.adaptive_min_frames = 8
+        self.adaptive_max_frames = 96
+        self.adaptive_group_size = 4
+        self.adaptive_alpha = 0.05
+
+    def cache_params(self):
+        """Settings that change the result for a given video, for result caching."""
+        return {
+            'max_frames': self.max_frames,
+            'detection_max_side': self.detection_max_side,
+            'min_face_size': self.min_face_size,
+            'track_interval': self.track_interval,
+            'multi_face': self.multi_face,
+            'face_min_confidence': self.face_min_confidence,
+            'face_min_side': self.face_min_side,
+            'frame_dedup_distance': self.frame_dedup_distance,
+        }
 
     def load_model(self):
         try:
-            if not os.path.exists(self.model_path):
-                raise FileNotFoundError(f"Model file not found at {self.model_path}")
-
             print(f"Loading model from {self.model_path}")
-            model = load_model(self.model_path, compile=False)
+            # Shared with every other detector in the process using the same
+            # file; .tflite paths load the INT8 model from benchmarks/quantize_cnn.py
+            model = registry.get(self.model_path)
             print("Model loaded successfully")
             return model
             
@@ -28,158 +85,471 @@ class DeepfakeDetector:
             print(f"Error loading model: {str(e)}")
             raise
 
+    def warm_up(self):
+        """Run MTCNN and the CNN once so the first request doesn't build their graphs."""
+        blank = np.zeros((self.target_size[1] * 2, self.target_size[0] * 2, 3), dtype=np.uint8)
+        self.detect_faces(blank)
+        self.run_model(np.zeros((1,) + self.target_size + (3,), dtype=np.float32))
+        print("Detector warm-up complete")
+
+    def detection_min_face_size(self, frame):
+        if self.min_face_size == 'auto':
+            return min_face_size_for(self.target_size, self.detection_max_side, max(frame.shape[:2]))
+        return self.min_face_size
+
+    def detect_faces(self, frame):
+        small, scale = downscale_frame(frame, self.detection_max_side)
+        # Convert BGR to RGB for MTCNN
+        frame_rgb = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+        if self.min_face_size != 'auto':
+            results = self.detector.detect_faces(frame_rgb)
+        else:
+            # min_face_size depends on the frame, so set and detect atomically
+            with self._detect_lock:
+                self.detector.min_face_size = self.detection_min_face_size(frame)
+                results = self.detector.detect_faces(frame_rgb)
+        return rescale_detections(results, scale)
+
+    def crop_face(self, frame, results):
+        if results:
+            x, y, width, height = pad_box(results[0]['box'], frame.shape)
+            face = frame[y:y+height, x:x+width]
+            face = cv2.resize(face, self.target_size)
+            return face, True
+        else:
+            # If no face is detected, return the resized full frame
+            return cv2.resize(frame, self.target_size), False
+
+    def crop_faces(self, frame, results):
+        """Every face passing the confidence and size thresholds, as (crop, box, confidence)."""
+        faces = []
+        for result in results:
+            box = pad_box(result['box'], frame.shape)
+            x, y, width, height = box
+            if result.get('confidence', 1.0) < self.face_min_confidence or min(width, height) < self.face_min_side:
+                continue
+            faces.append((cv2.resize(frame[y:y+height, x:x+width], self.target_size), box, result.get('confidence', 1.0)))
+        return faces
+
     def detect_and_crop_face(self, frame):
         try:
-            # Convert BGR to RGB for MTCNN
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = self.detector.detect_faces(frame_rgb)
-            
-            if results:
-                bounding_box = results[0]['box']
-                x, y, width, height = bounding_box
-                # Add padding to the bounding box
-                padding = int(min(width, height) * 0.1)
-                x = max(0, x - padding)
-                y = max(0, y - padding)
-                width = min(frame.shape[1] - x, width + 2*padding)
-                height = min(frame.shape[0] - y, height + 2*padding)
-                
-                face = frame[y:y+height, x:x+width]
-                face = cv2.resize(face, self.target_size)
-                return face, True
-            else:
-                # If no face is detected, return the resized full frame
-                return cv2.resize(frame, self.target_size), False
+            results = self.detect_faces(frame)
+            return self.crop_face(frame, results)
                 
         except Exception as e:
             print(f"Error detecting face: {str(e)}")
             return cv2.resize(frame, self.target_size), False
 
-    def preprocess_face(self, face):
+    def new_tracker(self):
+        """Per-video FaceTracker, or None when every frame gets a full detection."""
+        if self.track_interval <= 1:
+            return None
+        return FaceTracker(redetect_interval=self.track_interval, min_score=self.track_min_score)
+
+    def track_and_crop_face(self, frame, tracker):
         try:
-            # Convert BGR to RGB
-            face_rgb = cv2.cvtColor(face, cv2.COLOR_BGR2RGB)
-            # Convert to array and normalize
-            img_array = image.img_to_array(face_rgb)
-            img_array = np.expand_dims(img_array, axis=0)
-            img_array = img_array / 255.0  # Normalize to [0, 1]
-            return img_array
-            
+            tracked = tracker.track(frame)
+            if tracked is not None:
+                box, score = tracked
+                return self.crop_face(frame, [{'box': list(box), 'confidence': score}])
+
+            results = self.detect_faces(frame)
+            tracker.update(frame, results[0]['box'] if results else None)
+            return self.crop_face(frame, results)
+
         except Exception as e:
-            print(f"Error preprocessing face: {str(e)}")
+            print(f"Error detecting face: {str(e)}")
+            tracker.reset()
+            return cv2.resize(frame, self.target_size), False
+
+    def detect_and_crop_faces(self, frames, tracker=None):
+        """Detect and crop a group of frames, in parallel when a face pool is set."""
+        if tracker is not None:
+            # Tracking carries state from frame to frame, so it runs serially
+            return [self.track_and_crop_face(frame, tracker) for frame in frames]
+        if self.face_pool is None or len(frames) < 2:
+            return [self.detect_and_crop_face(frame) for frame in frames]
+
+        scaled = [downscale_frame(frame, self.detection_max_side) for frame in frames]
+        detections = self.face_pool.detect(
+            [small for small, _ in scaled],
+            [self.detection_min_face_size(frame) for frame in frames],
+        )
+
+        crops = []
+        for frame, (_, scale), results in zip(frames, scaled, detections):
+            try:
+                if isinstance(results, Exception):
+                    raise results
+                crops.append(self.crop_face(frame, rescale_detections(results, scale)))
+            except Exception as e:
+                print(f"Error detecting face: {str(e)}")
+                crops.append((cv2.resize(frame, self.target_size), False))
+        return crops
+
+    def detect_all_faces(self, frames):
+        """MTCNN results for every frame, in parallel when a face pool is set; failures give []."""
+        if self.face_pool is None or len(frames) < 2:
+            detections = []
+            for frame in frames:
+                try:
+                    detections.append(self.detect_faces(frame))
+                except Exception as e:
+                    print(f"Error detecting face: {str(e)}")
+                    detections.append([])
+            return detections
+
+        scaled = [downscale_frame(frame, self.detection_max_side) for frame in frames]
+        results = self.face_pool.detect(
+            [small for small, _ in scaled],
+            [self.detection_min_face_size(frame) for frame in frames],
+        )
+        detections = []
+        for (_, scale), result in zip(scaled, results):
+            if isinstance(result, Exception):
+                print(f"Error detecting face: {str(result)}")
+                detections.append([])
+            else:
+                detections.append(rescale_detections(result, scale))
+        return detections
+
+    def preprocess_faces(self, faces):
+        try:
+            # Stack BGR crops, flip to RGB and normalize the whole batch at once
+            batch = np.stack(faces)[..., ::-1].astype(np.float32)
+            batch /= 255.0  # Normalize to [0, 1]
+            return batch
+
+        except Exception as e:
+            print(f"Error preprocessing faces: {str(e)}")
             raise
 
+    def fake_probabilities(self, prediction):
+        # Handle different model output formats
+        if isinstance(prediction, list):
+            prediction = prediction[0]
+        prediction = np.asarray(prediction)
+        if prediction.ndim > 1 and prediction.shape[1] > 1:
+            # If model outputs probabilities for both classes
+            return prediction[:, 1]  # Take fake probability
+        return prediction.reshape(len(prediction), -1)[:, 0]  # Single output
+
+    def run_model(self, batch):
+        """Single forward pass over a preprocessed batch; returns fake probabilities."""
+        prediction = self.model.predict(batch, batch_size=len(batch), verbose=0)
+        return self.fake_probabilities(prediction)
+
+    def predict_faces(self, faces):
+        """Run the model on cropped faces, max_batch_size faces per forward pass."""
+        try:
+            if self.scheduler is not None and len(faces):
+                return self.scheduler.predict(self.preprocess_faces(faces))
+
+            probabilities = []
+            for start in range(0, len(faces), self.max_batch_size):
+                batch = self.preprocess_faces(faces[start:start + self.max_batch_size])
+                probabilities.append(self.run_model(batch))
+
+            if not probabilities:
+                return np.zeros(0, dtype=np.float32)
+            return np.concatenate(probabilities)
+
+        except Exception as e:
+            print(f"Error predicting faces: {str(e)}")
+            raise
+
+    def score(self, probability):
+        is_fake = bool(probability >= 0.5)  # Adjust threshold if needed
+        confidence = float(probability if is_fake else 1 - probability) * 100
+        return is_fake, confidence
+
     def predict_frame(self, frame):
         try:
             # Detect and crop face
             face, face_detected = self.detect_and_crop_face(frame)
-            
-            # Preprocess the face
-            processed_face = self.preprocess_face(face)
-            
+
             # Get prediction
-            prediction = self.model.predict(processed_face)
-            
-            # Handle different model output formats
-            if isinstance(prediction, list):
-                prediction = prediction[0]
-            elif len(prediction.shape) > 1 and prediction.shape[1] > 1:
-                # If model outputs probabilities for both classes
-                prediction = prediction[0][1]  # Take fake probability
-            else:
-                prediction = prediction[0][0]  # Single output
-            
-            # Get result
-            is_fake = prediction >= 0.5  # Adjust threshold if needed
-            confidence = float(prediction if is_fake else 1 - prediction) * 100
-            
+            probability = self.predict_faces([face])[0]
+            is_fake, confidence = self.score(probability)
+
             return is_fake, confidence, face_detected
             
         except Exception as e:
             print(f"Error predicting frame: {str(e)}")
             raise
 
-    def extract_frames(self, video_path, max_frames=32):
+    def iter_frames(self, video_path, max_frames=32, strategy='auto'):
+        """Yield sampled BGR frames one at a time without holding the whole list."""
+        sampler = FrameSampler(num_frames=max_frames, strategy=strategy)
+        for _, frame in sampler.frames(video_path):
+            yield frame
+
+    def extract_frames(self, video_path, max_frames=32, strategy='auto'):
         print(f"Extracting frames from {video_path}")
-        frames = []
         try:
-            cap = cv2.VideoCapture(video_path)
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            frame_indices = np.linspace(0, total_frames-1, max_frames, dtype=int)
-            
-            for idx in frame_indices:
-                cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
-                ret, frame = cap.read()
-                if ret:
-                    frames.append(frame)
-            cap.release()
+            frames = list(self.iter_frames(video_path, max_frames, strategy))
         except Exception as e:
             print(f"Error extracting frames: {str(e)}")
             raise
 
         return frames
 
-    def predict(self, video_path):
+    def predict(self, video_path, progress=None, multi_face=None, adaptive=False, min_frames=None, max_frames=None):
+        """Analyze a video; progress(stage, done, total) is called as work completes."""
         try:
             print(f"Starting video analysis for {video_path}")
+            multi_face = self.multi_face if multi_face is None else multi_face
+
+            # Early exit applies to the single-face verdict
+            if adaptive and not multi_face:
+                return self.predict_adaptive(video_path, progress, min_frames, max_frames)
+
+            # Multi-face mode links faces across all sampled frames, so it
+            # runs on the extracted frames rather than through the pipeline
+            if self.pipelined and not multi_face:
+                # Overlap decode, face detection and inference in separate workers
+                pipeline = VideoPipeline(self, queue_size=self.queue_size, max_frames=self.max_frames, progress=progress)
+                return pipeline.run(video_path)
             
             # Extract frames
-            frames = self.extract_frames(video_path)
+            frames = self.extract_frames(video_path, self.max_frames)
             if len(frames) == 0:
                 raise ValueError("No frames could be extracted from the video")
+            if progress is not None:
+                progress('frames_decoded', len(frames), len(frames))
 
-            return self.analyze_video(frames)
+            if multi_face:
+                return self.analyze_faces(frames, progress)
+            return self.analyze_video(frames, progress)
 
         except Exception as e:
             print(f"Error analyzing video: {str(e)}")
             raise
 
-    def analyze_video(self, frames):
+    def predict_adaptive(self, video_path, progress=None, min_frames=None, max_frames=None):
+        """Score frames coarse to fine and stop as soon as the verdict is statistically settled."""
+        min_frames = min_frames or self.adaptive_min_frames
+        max_frames = max(max_frames or self.adaptive_max_frames, min_frames)
+        group_size = self.adaptive_group_size
+        verdict = SequentialVerdict(alpha=self.adaptive_alpha, max_looks=-(-max_frames // group_size))
+
+        predictions, confidences, faces_detected = [], [], []
+        decided = None
+        sampler = FrameSampler(num_frames=max_frames)
+        frames = sampler.progressive_frames(video_path)
         try:
-            predictions = []
-            confidences = []
-            faces_detected = []
-            processed_frames = []
-
-            for i, frame in enumerate(frames):
-                print(f"Analyzing frame {i+1}/{len(frames)}")
-                is_fake, confidence, face_detected = self.predict_frame(frame)
-                
+            while decided is None:
+                group = [frame for _, frame in islice(frames, group_size)]
+                if not group:
+                    break
+                # Frames are far apart in time, so no tracker: detect on each
+                crops = self.detect_and_crop_faces(group)
+                for (_, face_detected), probability in zip(crops, self.predict_faces([face for face, _ in crops])):
+                    is_fake, confidence = self.score(probability)
+                    predictions.append(is_fake)
+                    confidences.append(confidence)
+                    faces_detected.append(face_detected)
+                if progress is not None:
+                    # Every stage advances per group; the budget is the upper bound
+                    for stage in ('frames_decoded', 'faces_detected', 'batches_inferred'):
+                        progress(stage, len(predictions), max_frames)
+
+                if len(predictions) >= min_frames:
+                    votes = [p for p, d in zip(predictions, faces_detected) if d]
+                    decided = verdict.update(sum(votes), len(votes))
+        finally:
+            frames.close()
+
+        if not predictions:
+            raise ValueError("No frames could be extracted from the video")
+        result = self.summarize(predictions, confidences, faces_detected)
+        result['adaptive'] = {
+            'frames_scored': len(predictions),
+            'min_frames': min_frames,
+            'max_frames': max_frames,
+            'stopped_early': decided is not None,
+            'p_value': verdict.p_value,
+        }
+        return result
+
+    def analyze_faces(self, frames, progress=None):
+        """Multi-face analysis: score every qualifying face and aggregate per identity track."""
+        try:
+            print(f"Detecting all faces in {len(frames)} frames")
+            detections = self.detect_all_faces(frames)
+            linker = TrackLinker()
+            crops = []
+            owners = []  # (frame index, track id or None for a face-less frame)
+            for index, (frame, results) in enumerate(zip(frames, detections)):
+                faces = self.crop_faces(frame, results)
+                if not faces:
+                    # Same fallback as single-face mode: score the whole frame
+                    crops.append(cv2.resize(frame, self.target_size))
+                    owners.append((index, None, None))
+                    continue
+                track_ids, _ = linker.link(index, [box for _, box, _ in faces])
+                for (face, box, _), track_id in zip(faces, track_ids):
+                    crops.append(face)
+                    owners.append((index, track_id, box))
+            if progress is not None:
+                progress('faces_detected', len(frames), len(frames))
+
+            # All faces from all frames go through the model in batches, so
+            # extra faces only make batches fuller
+            print(f"Running batched inference on {len(crops)} faces")
+            probabilities = self.predict_faces(crops)
+            if progress is not None:
+                batches = -(-len(crops) // self.max_batch_size)
+                progress('batches_inferred', batches, batches)
+
+            # Per-frame view for the existing fields: the most suspicious face
+            frame_best = {}
+            tracks = {}
+            for (index, track_id, box), probability in zip(owners, probabilities):
+                if index not in frame_best or probability > frame_best[index][0]:
+                    frame_best[index] = (probability, track_id is not None)
+                if track_id is not None:
+                    track = tracks.setdefault(track_id, {'frames': [], 'boxes': [], 'probabilities': []})
+                    track['frames'].append(index)
+                    track['boxes'].append([int(v) for v in box])
+                    track['probabilities'].append(float(probability))
+
+            predictions, confidences, faces_detected = [], [], []
+            for index in range(len(frames)):
+                probability, face_detected = frame_best[index]
+                is_fake, confidence = self.score(probability)
                 predictions.append(is_fake)
                 confidences.append(confidence)
                 faces_detected.append(face_detected)
-                
-                # Only consider frames where a face was detected
-                if face_detected:
-                    processed_frames.append(frame)
-
-            # Calculate results only from frames with detected faces
-            if any(faces_detected):
-                valid_predictions = [p for p, d in zip(predictions, faces_detected) if d]
-                valid_confidences = [c for c, d in zip(confidences, faces_detected) if d]
-                
-                fake_ratio = sum(valid_predictions) / len(valid_predictions)
-                avg_confidence = sum(valid_confidences) / len(valid_confidences)
-            else:
-                fake_ratio = 0
-                avg_confidence = 0
-
-            # Final decision based on majority voting
-            is_fake = fake_ratio > 0.5
-            result = {
-                'result': 'FAKE' if is_fake else 'REAL',
-                'confidence': avg_confidence,
-                'frame_predictions': list(zip(predictions, confidences)),
-                'faces_detected': faces_detected,
-                'total_frames': len(frames),
-                'frames_with_faces': sum(faces_detected)
-            }
-            
-            print(f"Analysis complete. Result: {result['result']} with {result['confidence']:.2f}% confidence")
-            print(f"Faces detected in {result['frames_with_faces']}/{result['total_frames']} frames")
-            
+
+            result = self.summarize(predictions, confidences, faces_detected)
+            result.update(self.summarize_tracks(tracks))
+            result['faces_analyzed'] = sum(track_id is not None for _, track_id, _ in owners)
             return result
+
+        except Exception as e:
+            print(f"Error analyzing video: {str(e)}")
+            raise
+
+    def summarize_tracks(self, tracks, min_track_frames=2):
+        """Per-track scores; the video is FAKE if any sustained track is."""
+        summaries = []
+        for track_id, track in sorted(tracks.items()):
+            scores = [self.score(p) for p in track['probabilities']]
+            fake_ratio = sum(is_fake for is_fake, _ in scores) / len(scores)
+            summaries.append({
+                'track_id': track_id,
+                'result': 'FAKE' if fake_ratio > 0.5 else 'REAL',
+                'fake_ratio': fake_ratio,
+                'confidence': sum(confidence for _, confidence in scores) / len(scores),
+                'mean_probability': sum(track['probabilities']) / len(scores),
+                'frames': track['frames'],
+                'boxes': track['boxes'],
+            })
+
+        # Faces seen only once are usually false positives; only fall back
+        # to them when no face was tracked for longer
+        sustained = [t for t in summaries if len(t['frames']) >= min_track_frames] or summaries
+        if not sustained:
+            return {'tracks': summaries}
+        fake_tracks = [t for t in sustained if t['result'] == 'FAKE']
+        deciding = fake_tracks or sustained
+        return {
+            'result': 'FAKE' if fake_tracks else 'REAL',
+            'confidence': (max(t['confidence'] for t in fake_tracks) if fake_tracks
+                           else sum(t['confidence'] for t in deciding) / len(deciding)),
+            'tracks': summaries,
+        }
+
+    def collect_faces(self, frames, progress=None):
+        """Deduplicate frames and crop one face per remaining frame, ready for predict_faces."""
+        # Near-identical frames reuse the score of the frame they match
+        dedup = FrameDeduplicator(self.frame_dedup_distance)
+        sources = [dedup.match(frame, position) for position, frame in enumerate(frames)]
+        unique = [frame for frame, source in zip(frames, sources) if source is None]
+
+        # Detect and crop every face first so the model runs in batches
+        print(f"Detecting faces in {len(unique)} of {len(frames)} frames")
+        tracker = self.new_tracker()
+        faces = []
+        faces_detected = []
+        for face, face_detected in self.detect_and_crop_faces(unique, tracker):
+            faces.append(face)
+            faces_detected.append(face_detected)
+        if progress is not None:
+            progress('faces_detected', len(frames), len(frames))
+
+        return {
+            'faces': faces,
+            'faces_detected': faces_detected,
+            'sources': sources,
+            'frames_deduplicated': dedup.skipped,
+            'face_tracking': tracker.stats() if tracker is not None else None,
+        }
+
+    def score_faces(self, collected, probabilities):
+        """Video result from collect_faces output and the fake probability of each face."""
+        predictions = []
+        confidences = []
+        for probability in probabilities:
+            is_fake, confidence = self.score(probability)
+            predictions.append(is_fake)
+            confidences.append(confidence)
+
+        # Expand back to one row per sampled frame
+        rows = iter(zip(predictions, confidences, collected['faces_detected']))
+        scored = {}
+        for position, source in enumerate(collected['sources']):
+            scored[position] = next(rows) if source is None else scored[source]
+        columns = list(zip(*scored.values())) or [(), (), ()]
+        predictions, confidences, faces_detected = (list(column) for column in columns)
+
+        result = self.summarize(predictions, confidences, faces_detected)
+        result['frames_deduplicated'] = collected['frames_deduplicated']
+        if collected['face_tracking'] is not None:
+            result['face_tracking'] = collected['face_tracking']
+        return result
+
+    def analyze_video(self, frames, progress=None):
+        try:
+            collected = self.collect_faces(frames, progress)
+
+            print(f"Running batched inference on {len(collected['faces'])} faces")
+            probabilities = self.predict_faces(collected['faces'])
+            if progress is not None:
+                batches = -(-len(collected['faces']) // self.max_batch_size)
+                progress('batches_inferred', batches, batches)
+
+            return self.score_faces(collected, probabilities)
             
         except Exception as e:
             print(f"Error analyzing video: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    def summarize(self, predictions, confidences, faces_detected):
+        # Calculate results only from frames with detected faces
+        if any(faces_detected):
+            valid_predictions = [p for p, d in zip(predictions, faces_detected) if d]
+            valid_confidences = [c for c, d in zip(confidences, faces_detected) if d]
+            
+            fake_ratio = sum(valid_predictions) / len(valid_predictions)
+            avg_confidence = sum(valid_confidences) / len(valid_confidences)
+        else:
+            fake_ratio = 0
+            avg_confidence = 0
+
+        # Final decision based on majority voting
+        is_fake = fake_ratio > 0.5
+        result = {
+            'result': 'FAKE' if is_fake else 'REAL',
+            'confidence': avg_confidence,
+            'frame_predictions': list(zip(predictions, confidences)),
+            'faces_detected': faces_detected,
+            'total_frames': len(faces_detected),
+            'frames_with_faces': sum(faces_detected)
+        }
+        
+        print(f"Analysis complete. Result: {result['result']} with {result['confidence']:.2f}% confidence")
+        print(f"Faces detected in {result['frames_with_faces']}/{result['total_frames']} frames")
+        
+        return result
@@ -0,0 +1,89 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+# One MTCNN per worker process, created once by the pool initializer
+_worker_detector = None
+
+
+def _init_worker():
+    global _worker_detector
+    from mtcnn import MTCNN
+    _worker_detector = MTCNN()
+
+
+def _detect_shared(shm_name, offset, shape, dtype, min_face_size=None):
+    # Attach to the parent's buffer and read the frame in place (no pickling)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        frame = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        del frame
+        if min_face_size is not None:
+            _worker_detector.min_face_size = min_face_size
+        return _worker_detector.detect_faces(frame_rgb)
+    except Exception as e:
+        return e
+    finally:
+        shm.close()
+
+
+class FaceDetectionPool:
+    """Runs MTCNN.detect_faces for a group of frames across worker processes.
+
+    Frames are copied once into a shared-memory block and workers read them
+    by offset. Only the detection results come back to the caller, who does
+    the cropping, so crops match the serial detect_and_crop_face path.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        print(f"Starting face detection pool with {self.workers} workers...")
+        # spawn, not fork: TensorFlow state does not survive a fork
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+        )
+
+    def detect(self, frames, min_face_sizes=None):
+        """Return MTCNN results per frame, in order; failures come back as the exception."""
+        frames = [np.ascontiguousarray(frame) for frame in frames]
+        if min_face_sizes is None:
+            min_face_sizes = [None] * len(frames)
+        total = sum(frame.nbytes for frame in frames)
+        shm = shared_memory.SharedMemory(create=True, size=max(total, 1))
+        try:
+            futures = []
+            offset = 0
+            for frame, min_face_size in zip(frames, min_face_sizes):
+                view = np.ndarray(frame.shape, dtype=frame.dtype, buffer=shm.buf, offset=offset)
+                view[...] = frame
+                del view
+                futures.append(self.executor.submit(_detect_shared, shm.name, offset, frame.shape, frame.dtype.str, min_face_size))
+                offset += frame.nbytes
+
+            results = []
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    results.append(e)
+            return results
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def warm_up(self):
+        """Start every worker and let it run MTCNN once."""
+        blank = np.zeros((256, 256, 3), dtype=np.uint8)
+        for result in self.detect([blank] * self.workers):
+            if isinstance(result, Exception):
+                raise result
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
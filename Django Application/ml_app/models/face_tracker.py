@@ -0,0 +1,80 @@
+import cv2
+
+
+class FaceTracker:
+    """Carries a face box across consecutive frames so detection can be skipped.
+
+    After a full detection the face patch is kept as a template. On the next
+    frames the box is found again by normalized template matching inside a
+    window around its last position. A full detection is requested every
+    ``redetect_interval`` frames, or as soon as the match score drops below
+    ``min_score``.
+    """
+
+    def __init__(self, redetect_interval=5, min_score=0.6, search_margin=0.5, gray_conversion=cv2.COLOR_BGR2GRAY):
+        self.redetect_interval = redetect_interval
+        self.min_score = min_score
+        self.search_margin = search_margin
+        self.gray_conversion = gray_conversion
+        self.detections = 0
+        self.tracked = 0
+        self.reset()
+
+    def reset(self):
+        self.box = None
+        self.template = None
+        self.since_detection = 0
+
+    def _gray(self, frame):
+        return cv2.cvtColor(frame, self.gray_conversion) if frame.ndim == 3 else frame
+
+    def track(self, frame):
+        """Return (box, score) propagated from the previous frame, or None to request detection."""
+        if self.template is None or self.since_detection + 1 >= self.redetect_interval:
+            return None
+
+        gray = self._gray(frame)
+        x, y, width, height = self.box
+        margin_x = int(width * self.search_margin)
+        margin_y = int(height * self.search_margin)
+        left, top = max(0, x - margin_x), max(0, y - margin_y)
+        right = min(gray.shape[1], x + width + margin_x)
+        bottom = min(gray.shape[0], y + height + margin_y)
+
+        region = gray[top:bottom, left:right]
+        if region.shape[0] < height or region.shape[1] < width:
+            return None
+
+        scores = cv2.matchTemplate(region, self.template, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (match_x, match_y) = cv2.minMaxLoc(scores)
+        if score < self.min_score:
+            return None
+
+        self.box = (left + match_x, top + match_y, width, height)
+        self.template = gray[self.box[1]:self.box[1] + height, self.box[0]:self.box[0] + width].copy()
+        self.since_detection += 1
+        self.tracked += 1
+        return self.box, float(score)
+
+    def update(self, frame, box):
+        """Record a fresh detection (or None when no face was found)."""
+        self.detections += 1
+        if box is None:
+            self.reset()
+            return
+
+        x, y, width, height = [int(v) for v in box]
+        x, y = max(0, x), max(0, y)
+        gray = self._gray(frame)
+        width = min(width, gray.shape[1] - x)
+        height = min(height, gray.shape[0] - y)
+        if width <= 0 or height <= 0:
+            self.reset()
+            return
+
+        self.box = (x, y, width, height)
+        self.template = gray[y:y + height, x:x + width].copy()
+        self.since_detection = 0
+
+    def stats(self):
+        return {'detections': self.detections, 'tracked': self.tracked}
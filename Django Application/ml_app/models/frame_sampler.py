@@ -0,0 +1,160 @@
+import cv2
+import numpy as np
+
+# Codecs where every frame is a keyframe, so seeking never re-decodes
+INTRA_ONLY_CODECS = {'MJPG', 'MJPA', 'JPEG', 'PNG ', 'RAWV', 'I420', 'YUY2', 'APCN', 'APCH', 'AP4H'}
+
+# Rough keyframe interval for long-GOP codecs when the container doesn't say
+DEFAULT_GOP_SIZE = 250
+
+
+class FrameSampler:
+    """Picks evenly spaced frames from a video with the cheapest decode strategy.
+
+    Strategies:
+      - 'sequential': one pass with grab(), retrieve() only for kept frames
+      - 'seek':       set CAP_PROP_POS_FRAMES per sampled index
+      - 'keyframe':   snap each sampled index to the nearest multiple of
+                      gop_size, so each sample costs a single decode when
+                      gop_size matches the encoder's fixed keyframe interval
+      - 'auto':       'seek' or 'sequential', from the codec, frame count
+                      and GOP estimate
+
+    The GOP size is estimated, not read from the container, so 'auto' never
+    snaps to keyframes: on a mismatched guess snapping would only move the
+    samples without making seeks cheaper.
+    """
+
+    def __init__(self, num_frames=32, strategy='auto', gop_size=None):
+        if strategy not in ('auto', 'sequential', 'seek', 'keyframe'):
+            raise ValueError(f"Unknown frame sampling strategy: {strategy}")
+        self.num_frames = num_frames
+        self.strategy = strategy
+        self.gop_size = gop_size
+
+    def codec(self, cap):
+        fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+        return ''.join(chr((fourcc >> (8 * i)) & 0xFF) for i in range(4)).upper()
+
+    def estimate_gop(self, cap):
+        if self.gop_size:
+            return self.gop_size
+        if self.codec(cap) in INTRA_ONLY_CODECS:
+            return 1
+        # Encoders commonly cap the keyframe interval at ~10s of video
+        fps = cap.get(cv2.CAP_PROP_FPS) or 0
+        if fps > 0:
+            return int(min(DEFAULT_GOP_SIZE, fps * 10))
+        return DEFAULT_GOP_SIZE
+
+    def sample_indices(self, total_frames):
+        if total_frames <= 0:
+            return np.zeros(0, dtype=int)
+        return np.unique(np.linspace(0, total_frames - 1, self.num_frames, dtype=int))
+
+    def progressive_indices(self, total_frames):
+        """Evenly spaced sample indices, ordered coarse to fine over the timeline.
+
+        Slot order follows the van der Corput sequence (0, 1/2, 1/4, 3/4,
+        ...), so every prefix covers the whole video roughly evenly.
+        """
+        grid = self.sample_indices(total_frames)
+        slots = len(grid)
+        if slots == 0:
+            return grid
+        order = []
+        seen = set()
+        span = 1 << max(slots - 1, 0).bit_length()
+        for i in range(span):
+            # Bit-reverse i within span: the i-th van der Corput point
+            reversed_i = int(format(i, f'0{span.bit_length() - 1}b')[::-1], 2) if span > 1 else 0
+            slot = reversed_i * slots // span
+            if slot not in seen:
+                seen.add(slot)
+                order.append(slot)
+        return grid[order]
+
+    def choose_strategy(self, indices, gop):
+        if self.strategy != 'auto':
+            return self.strategy
+        if len(indices) == 0:
+            return 'sequential'
+        if gop <= 1:
+            # Every frame is a keyframe; seeking decodes exactly one frame each
+            return 'seek'
+
+        # Cost in decoded frames: a seek decodes ~gop/2 frames on average from
+        # the previous keyframe, a sequential pass decodes every frame once
+        sequential_cost = indices[-1] + 1
+        seek_cost = len(indices) * (gop / 2.0)
+        return 'sequential' if sequential_cost <= seek_cost else 'seek'
+
+    def frames(self, video_path):
+        """Yield (frame_index, BGR frame) for the sampled frames, in order."""
+        cap = cv2.VideoCapture(video_path)
+        try:
+            if not cap.isOpened():
+                raise ValueError(f"Could not open video file {video_path}")
+
+            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            indices = self.sample_indices(total_frames)
+            gop = self.estimate_gop(cap)
+            strategy = self.choose_strategy(indices, gop)
+            print(f"Sampling {len(indices)}/{total_frames} frames using '{strategy}' strategy (gop~{gop})")
+
+            if strategy == 'sequential':
+                yield from self._sequential(cap, indices)
+            elif strategy == 'keyframe':
+                yield from self._seek(cap, self._snap_to_keyframes(indices, gop, total_frames))
+            else:
+                yield from self._seek(cap, indices)
+        finally:
+            cap.release()
+
+    def progressive_frames(self, video_path):
+        """Yield (frame_index, BGR frame) coarse to fine, so a caller can stop early."""
+        cap = cv2.VideoCapture(video_path)
+        try:
+            if not cap.isOpened():
+                raise ValueError(f"Could not open video file {video_path}")
+
+            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            indices = self.progressive_indices(total_frames)
+            gop = self.estimate_gop(cap)
+            # Out-of-order indices rule out a sequential pass; snap to
+            # keyframes only when asked to and samples are spread wider than a GOP
+            spacing = total_frames / max(len(indices), 1)
+            if gop > 1 and spacing > gop and self.strategy == 'keyframe':
+                snapped = np.clip(np.round(indices / gop).astype(int) * gop, 0, max(total_frames - 1, 0))
+                _, first = np.unique(snapped, return_index=True)
+                indices = snapped[np.sort(first)]
+            print(f"Progressive sampling of up to {len(indices)}/{total_frames} frames (gop~{gop})")
+            yield from self._seek(cap, indices)
+        finally:
+            cap.release()
+
+    def _sequential(self, cap, indices):
+        wanted = iter(indices)
+        target = next(wanted, None)
+        position = 0
+        while target is not None:
+            if not cap.grab():
+                break
+            if position == target:
+                ret, frame = cap.retrieve()
+                if ret:
+                    yield position, frame
+                target = next(wanted, None)
+            position += 1
+
+    def _seek(self, cap, indices):
+        for idx in indices:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, int(idx))
+            ret, frame = cap.read()
+            if ret:
+                yield int(idx), frame
+
+    def _snap_to_keyframes(self, indices, gop, total_frames):
+        snapped = np.round(indices / gop).astype(int) * gop
+        snapped = np.clip(snapped, 0, max(total_frames - 1, 0))
+        return np.unique(snapped)
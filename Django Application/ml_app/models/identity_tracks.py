@@ -0,0 +1,57 @@
+from .detection_scaling import box_iou
+
+
+class TrackLinker:
+    """Links the face boxes found in successive sampled frames into per-identity tracks.
+
+    Each frame's boxes are greedily matched to the open tracks, best
+    overlap first. A box and a track match when their IoU reaches
+    ``min_iou``, or when the box centre moved less than ``max_shift`` box
+    widths (sampled frames can be far apart). A track that goes unmatched
+    for more than ``max_gap`` frames is closed, and its identity is never
+    reused.
+    """
+
+    def __init__(self, min_iou=0.3, max_shift=0.5, max_gap=2):
+        self.min_iou = min_iou
+        self.max_shift = max_shift
+        self.max_gap = max_gap
+        self.open = {}      # track id -> (last box, last frame index)
+        self.next_id = 0
+
+    def _affinity(self, box, track_box):
+        iou = box_iou(box, track_box)
+        if iou >= self.min_iou:
+            return 1.0 + iou
+        x, y, width, height = box
+        tx, ty, twidth, theight = track_box
+        shift = abs((x + width / 2) - (tx + twidth / 2)) + abs((y + height / 2) - (ty + theight / 2))
+        size = max(width, twidth, 1)
+        return 1.0 - shift / size if shift <= self.max_shift * size else 0.0
+
+    def link(self, frame_index, boxes):
+        """Track ids for boxes (in order), plus the ids of tracks closed at this frame."""
+        closed = [track_id for track_id, (_, last) in self.open.items() if frame_index - last > self.max_gap + 1]
+        for track_id in closed:
+            del self.open[track_id]
+
+        candidates = sorted(
+            ((self._affinity(box, track_box), i, track_id)
+             for i, box in enumerate(boxes)
+             for track_id, (track_box, _) in self.open.items()),
+            reverse=True,
+        )
+        ids = [None] * len(boxes)
+        taken = set()
+        for affinity, i, track_id in candidates:
+            if affinity <= 0 or ids[i] is not None or track_id in taken:
+                continue
+            ids[i] = track_id
+            taken.add(track_id)
+
+        for i, box in enumerate(boxes):
+            if ids[i] is None:
+                ids[i] = self.next_id
+                self.next_id += 1
+            self.open[ids[i]] = (tuple(box), frame_index)
+        return ids, closed
@@ -1,28 +1,42 @@
 import cv2
 import numpy as np
-import tensorflow as tf
-from tensorflow.keras.models import load_model
-import os
+from .model_registry import registry
 
 class ImageDeepfakeDetector:
-    def __init__(self, model_path='ml_app/models/cnn_model.h5'):
+    def __init__(self, model_path='ml_app/models/cnn_model.h5', batch_size=32):
         print("Initializing Image Deepfake Detector...")
+        self.model_path = model_path
         self.target_size = (128, 128)  # Changed to match video model input size
+        # Optional shared InferenceScheduler used instead of self.model
+        self.scheduler = None
+        # Images per forward pass in predict_batch
+        self.batch_size = batch_size
         
+        # model_path=None gives a decode/preprocess-only detector (scan_media workers)
+        self.model = None
+        if not model_path:
+            return
+
         try:
-            # Load the same CNN model used for video detection
-            self.model = load_model(model_path)
+            # Same CNN as video detection; the registry hands back the
+            # instance DeepfakeDetector already loaded for this path
+            self.model = registry.get(model_path)
             print("Model loaded successfully")
             
-            # Warm up the model with correct input shape
-            dummy_input = np.zeros((1, 128, 128, 3))  # Changed dimensions
-            self.model.predict(dummy_input)
-            print("Model warm-up complete")
-            
         except Exception as e:
             print(f"Error loading model: {str(e)}")
             raise
 
+    def warm_up(self):
+        # Warm up the model with correct input shape
+        dummy_input = np.zeros((1,) + self.target_size + (3,), dtype=np.float32)
+        self.model.predict(dummy_input)
+        print("Model warm-up complete")
+
+    def cache_params(self):
+        """Settings that change the result for a given image, for result caching."""
+        return {'target_size': self.target_size}
+
     def preprocess_image(self, image):
         try:
             # Convert to RGB if needed
@@ -48,38 +62,87 @@ class ImageDeepfakeDetector:
             print(f"Error in preprocessing: {str(e)}")
             raise
 
+    def decode_image(self, data):
+        """Decode an encoded image straight from a bytes-like buffer (no temp file)."""
+        buffer = np.frombuffer(memoryview(data), dtype=np.uint8)
+        image = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError("Could not decode image data")
+        return image
+
+    def read_image(self, image_path):
+        # Read image
+        image = cv2.imread(image_path)
+        if image is None:
+            raise ValueError("Could not read image file")
+        return image
+
+    def predict_bytes(self, data):
+        try:
+            print(f"Starting image analysis for {len(data)} byte upload")
+            return self.predict_image(self.decode_image(data))
+
+        except Exception as e:
+            print(f"Error analyzing image: {str(e)}")
+            raise
+
     def predict(self, image_path):
         try:
             print(f"Starting image analysis for {image_path}")
             
-            # Read image
-            image = cv2.imread(image_path)
-            if image is None:
-                raise ValueError("Could not read image file")
-            
-            # Get original image details
-            height, width = image.shape[:2]
-            
-            # Preprocess image
-            processed_image = self.preprocess_image(image)
-            
-            # Make prediction
-            prediction = self.model.predict(processed_image)[0][0]
-            
-            # Convert prediction to result
-            is_fake = prediction > 0.5
-            confidence = float(prediction * 100) if is_fake else float((1 - prediction) * 100)
-            
-            result = {
-                'result': 'FAKE' if is_fake else 'REAL',
-                'confidence': confidence,
-                'image_size': [height, width, image.shape[2]],
-                'input_shape': self.target_size + (3,)
-            }
-            
-            print(f"Image analysis complete. Result: {result['result']} with {result['confidence']:.2f}% confidence")
-            return result
+            return self.predict_image(self.read_image(image_path))
 
         except Exception as e:
             print(f"Error analyzing image: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    def predict_image(self, image):
+        # Preprocess image
+        processed_image = self.preprocess_image(image)
+        
+        # Make prediction
+        if self.scheduler is not None:
+            prediction = self.scheduler.predict(processed_image)[0]
+        else:
+            prediction = self.model.predict(processed_image)[0][0]
+        
+        result = self.describe(image.shape, prediction)
+        print(f"Image analysis complete. Result: {result['result']} with {result['confidence']:.2f}% confidence")
+        return result
+
+    def describe(self, image_shape, prediction):
+        # Convert prediction to result
+        height, width = image_shape[:2]
+        is_fake = prediction > 0.5
+        confidence = float(prediction * 100) if is_fake else float((1 - prediction) * 100)
+        
+        return {
+            'result': 'FAKE' if is_fake else 'REAL',
+            'confidence': confidence,
+            'image_size': [height, width, image_shape[2] if len(image_shape) == 3 else 1],
+            'input_shape': self.target_size + (3,)
+        }
+
+    def prepare(self, data):
+        """Decode and preprocess one encoded image; safe to run in parallel threads."""
+        image = self.decode_image(data)
+        return image, self.preprocess_image(image)[0]
+
+    def predict_batch(self, processed):
+        """Fake probabilities for stacked preprocessed images (N, 128, 128, 3)."""
+        if self.scheduler is not None:
+            # Batched together with any concurrent video/image traffic
+            return self.scheduler.predict(processed)
+
+        probabilities = []
+        for start in range(0, len(processed), self.batch_size):
+            batch = processed[start:start + self.batch_size]
+            count = len(batch)
+            if count < self.batch_size:
+                # Keep the input shape fixed so the model never re-plans
+                batch = np.concatenate([batch, np.zeros((self.batch_size - count,) + batch.shape[1:], batch.dtype)])
+            prediction = self.model.predict(batch, batch_size=self.batch_size, verbose=0)
+            probabilities.append(np.asarray(prediction).reshape(self.batch_size, -1)[:count, 0])
+        if not probabilities:
+            return np.zeros(0, dtype=np.float32)
+        return np.concatenate(probabilities)
@@ -0,0 +1,118 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class InferenceScheduler:
+    """Coalesces preprocessed faces from concurrent requests into shared batches.
+
+    Callers submit samples and get back one Future per sample. A single
+    worker thread drains the queue, runs one forward pass per batch through
+    ``predict_fn`` and resolves each caller's future with its probability.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=32, max_wait_ms=5):
+        print("Initializing Inference Scheduler...")
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue = queue.Queue()
+
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._samples = 0
+        self._max_queue_depth = 0
+
+        self._running = True
+        self._worker = threading.Thread(target=self._run, name='inference-scheduler', daemon=True)
+        self._worker.start()
+
+    def submit(self, inputs):
+        """Queue every sample in ``inputs`` and return one Future per sample."""
+        if not self._running:
+            raise RuntimeError("Inference scheduler has been shut down")
+
+        futures = []
+        for sample in inputs:
+            future = Future()
+            self.queue.put((sample, future))
+            futures.append(future)
+
+        with self._lock:
+            self._max_queue_depth = max(self._max_queue_depth, self.queue.qsize())
+        return futures
+
+    def predict(self, inputs, timeout=None):
+        """Blocking helper: submit ``inputs`` and wait for all probabilities."""
+        futures = self.submit(inputs)
+        return np.array([future.result(timeout=timeout) for future in futures], dtype=np.float32)
+
+    def _collect_batch(self):
+        # Block for the first sample, then keep filling until the batch is
+        # full or max_wait has elapsed since that sample arrived.
+        item = self.queue.get()
+        if item is None:
+            return None
+
+        batch = [item]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # Put the shutdown sentinel back so the loop sees it next
+                self.queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            if batch is None:
+                break
+
+            samples, futures = zip(*batch)
+            try:
+                probabilities = self.predict_fn(np.stack(samples))
+                for future, probability in zip(futures, probabilities):
+                    future.set_result(float(probability))
+            except Exception as e:
+                print(f"Error running batched inference: {str(e)}")
+                for future in futures:
+                    future.set_exception(e)
+
+            with self._lock:
+                self._batches += 1
+                self._samples += len(batch)
+
+    def metrics(self):
+        with self._lock:
+            batches = self._batches
+            samples = self._samples
+            max_queue_depth = self._max_queue_depth
+
+        return {
+            'queue_depth': self.queue.qsize(),
+            'max_queue_depth': max_queue_depth,
+            'batches': batches,
+            'samples': samples,
+            'avg_batch_size': samples / batches if batches else 0,
+            'avg_batch_fill': samples / (batches * self.max_batch_size) if batches else 0,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0,
+        }
+
+    def shutdown(self, wait=True):
+        if not self._running:
+            return
+        self._running = False
+        self.queue.put(None)
+        if wait:
+            self._worker.join()
@@ -0,0 +1,110 @@
+"""
+Mel-spectrogram audio deepfake detector shared by the Streamlit app
+(web-app.py) and the Django API.
+
+No package-relative imports here: web-app.py imports this module by file
+name when run with ``streamlit run``.
+"""
+
+from functools import lru_cache
+
+import librosa
+import numpy as np
+
+
+@lru_cache(maxsize=None)
+def load_keras_model(model_path):
+    """Load a Keras model once per process and path."""
+    from tensorflow.keras import models
+    return models.load_model(model_path)
+
+
+class MelSpectrogramDetector:
+    """Scores an audio file in 6-second slices with the mel-spectrogram CNN.
+
+    The slices are a strided (n, samples) view of the signal, processed
+    ``max_batch_size`` at a time: one batched STFT/mel pass and one
+    ``model.predict`` call per chunk, with dB conversion and min-max scaling
+    vectorized per slice. Memory stays bounded by one chunk however long
+    the recording is, and the features match the old per-slice loop
+    exactly.
+    """
+
+    def __init__(self, model_path='simple-cnn-ssv.h5', loader=load_keras_model,
+                 slice_seconds=6.0, n_mels=128, threshold=0.5, max_batch_size=64):
+        self.model_path = model_path
+        self.model = loader(model_path)
+        self.slice_seconds = slice_seconds
+        self.n_mels = n_mels
+        self.threshold = threshold
+        self.max_batch_size = max_batch_size
+
+    def cache_params(self):
+        """Settings that change the result for a given recording, for result caching."""
+        return {'slice_seconds': self.slice_seconds, 'n_mels': self.n_mels, 'threshold': self.threshold}
+
+    def slices(self, ydat, samp_rate):
+        """(nslices, len_samp) view of the full 6 s slices; short clips are zero-padded to one slice."""
+        len_samp = int(samp_rate * self.slice_seconds)
+        nslices = ydat.shape[0] // len_samp
+        if nslices == 0:
+            # padding on the right for shorter audio files
+            return np.pad(ydat, (0, len_samp - ydat.shape[0]))[np.newaxis]
+        return ydat[:nslices * len_samp].reshape(nslices, len_samp)
+
+    def iter_features(self, ydat, samp_rate):
+        """Normalized mel spectrograms, (n, n_mels, frames), for max_batch_size slices at a time."""
+        slices = self.slices(ydat, samp_rate)
+        for start in range(0, len(slices), self.max_batch_size):
+            yield self.slice_features(slices[start:start + self.max_batch_size], samp_rate)
+
+    def extract_features(self, ydat, samp_rate):
+        """Normalized mel spectrograms, (nslices, n_mels, frames)."""
+        return np.concatenate(list(self.iter_features(ydat, samp_rate)))
+
+    def slice_features(self, slices, samp_rate):
+        S_mel = librosa.feature.melspectrogram(y=slices, sr=samp_rate, n_mels=self.n_mels)
+        # librosa.amplitude_to_db(S, ref=np.max) for every slice at once
+        S_mel_db = 20.0 * np.log10(np.maximum(S_mel, 1e-5))
+        S_mel_db -= S_mel_db.max(axis=(1, 2), keepdims=True)
+        np.maximum(S_mel_db, -80.0, out=S_mel_db)
+        low = S_mel_db.min(axis=(1, 2), keepdims=True)
+        # The maximum is 0 after the ref=max shift
+        return ((S_mel_db - low) / (0.0 - low)).astype(np.float32)
+
+    def warm_up(self):
+        len_samp = int(22050 * self.slice_seconds)
+        self.predict_features(self.slice_features(np.zeros((1, len_samp), dtype=np.float32), 22050))
+
+    def predict_features(self, features):
+        prediction = self.model.predict(features, batch_size=self.max_batch_size, verbose=0)
+        return np.asarray(prediction).reshape(len(features), -1)[:, 0]
+
+    def predict(self, audio_file):
+        # read the time series and sample rate from the audio file
+        ydat, samp_rate = librosa.load(audio_file)
+        probabilities = []
+        for features in self.iter_features(ydat, samp_rate):
+            probabilities.extend(self.predict_features(features))
+        probabilities = np.array(probabilities)
+        print(f" Number of 6 sec slices: {len(probabilities)}")
+
+        # The file is fake if any slice is
+        is_fake = bool((probabilities >= self.threshold).any())
+        top = float(probabilities.max())
+        return {
+            'result': 'FAKE' if is_fake else 'REAL',
+            'confidence': (top if is_fake else 1 - top) * 100,
+            'duration': ydat.shape[0] / samp_rate,
+            'sample_rate': samp_rate,
+            'input_shape': list(features.shape[1:]),
+            'windows': [
+                {
+                    'start': i * self.slice_seconds,
+                    'end': (i + 1) * self.slice_seconds,
+                    'probability': float(probability),
+                    'result': 'FAKE' if probability >= self.threshold else 'REAL',
+                }
+                for i, probability in enumerate(probabilities)
+            ],
+        }
@@ -0,0 +1,78 @@
+import mmap
+import os
+import threading
+import time
+
+
+def _default_loader(model_path, content=None):
+    # Imported on first load, so importing the registry keeps clear of TensorFlow
+    from .tflite_model import load_cnn
+    return load_cnn(model_path, content=content)
+
+
+class ModelRegistry:
+    """Loads each model artifact once per process and hands out shared references.
+
+    Models are keyed by resolved path, so detectors that name the same file
+    get the same object. TensorFlow is not fork-safe once it has built a
+    model, so a gunicorn master (``--preload``) calls ``preload_artifacts``
+    instead of ``preload``: it only maps the model files into memory. Each
+    forked worker then builds its models from that mapping instead of
+    reading the files again; the weights themselves are still private to
+    each worker.
+    """
+
+    def __init__(self, loader=_default_loader):
+        self.loader = loader
+        self._models = {}
+        self._artifacts = {}
+        self._load_seconds = {}
+        self._lock = threading.Lock()
+        self._loaded_in = os.getpid()
+
+    def key(self, model_path):
+        return os.path.realpath(str(model_path))
+
+    def get(self, model_path):
+        key = self.key(model_path)
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                if not os.path.exists(key):
+                    raise FileNotFoundError(f"Model file not found at {model_path}")
+                start = time.perf_counter()
+                content = self._artifacts.get(key)
+                model = self.loader(key) if content is None else self.loader(key, content=content)
+                self._models[key] = model
+                self._load_seconds[key] = time.perf_counter() - start
+            return model
+
+    def preload(self, model_paths):
+        """Build the models for model_paths now, in this process."""
+        for model_path in model_paths:
+            self.get(model_path)
+
+    def preload_artifacts(self, model_paths):
+        """Map the model files read-only, without touching TensorFlow; safe before fork."""
+        with self._lock:
+            for model_path in model_paths:
+                key = self.key(model_path)
+                if key in self._artifacts or not os.path.isfile(key):
+                    continue
+                with open(key, 'rb') as f:
+                    self._artifacts[key] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._loaded_in = os.getpid()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'models': {key: round(seconds, 3) for key, seconds in self._load_seconds.items()},
+                'preloaded_artifacts': sorted(self._artifacts),
+                # Differs from pid once artifacts were preloaded in a parent process
+                'loaded_in_pid': self._loaded_in,
+                'pid': os.getpid(),
+            }
+
+
+# One registry per process, shared by every detector
+registry = ModelRegistry()
@@ -0,0 +1,113 @@
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+
+def _gray(image):
+    if image.ndim == 2:
+        return image
+    if image.shape[2] == 4:
+        return cv2.cvtColor(image, cv2.COLOR_BGRA2GRAY)
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+
+def _pack(bits):
+    value = 0
+    for bit in bits.ravel():
+        value = (value << 1) | int(bit)
+    return value
+
+
+def dhash(image, hash_size=8):
+    """Difference hash: 64-bit int from horizontal gradients of a 9x8 thumbnail. Cheap; used per frame."""
+    small = cv2.resize(_gray(image), (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    return _pack(small[:, 1:] > small[:, :-1])
+
+
+def phash(image, hash_size=8):
+    """DCT hash: 64-bit int from the low frequencies of a 32x32 thumbnail. Robust to re-encoding and resizing."""
+    small = cv2.resize(_gray(image), (hash_size * 4, hash_size * 4), interpolation=cv2.INTER_AREA)
+    low = cv2.dct(small.astype(np.float32))[:hash_size, :hash_size]
+    # The DC term only reflects overall brightness
+    return _pack(low > np.median(low.ravel()[1:]))
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+class FrameDeduplicator:
+    """Per-video memory of scored frames, for skipping near-identical ones.
+
+    ``match`` returns the position of an already-scored frame whose dHash is
+    within ``max_distance`` bits, or None (after which the frame counts as
+    scored). A max_distance of 0 or less (the default) disables
+    deduplication: a 9x8 dHash ignores brightness and fine detail, so a
+    static-camera talking head collapses to a few "unique" frames.
+    """
+
+    def __init__(self, max_distance=0):
+        self.max_distance = max_distance
+        self.hashes = []   # (hash, position) of scored frames
+        self.skipped = 0
+
+    def match(self, frame, position):
+        if self.max_distance <= 0:
+            return None
+        value = dhash(frame)
+        for seen, source in self.hashes:
+            if hamming(value, seen) <= self.max_distance:
+                self.skipped += 1
+                return source
+        self.hashes.append((value, position))
+        return None
+
+
+class RecentHashIndex:
+    """Bounded LRU index from perceptual hashes to result-cache keys.
+
+    Lets a re-encoded copy of a recent image be served from the cache even
+    though its bytes (and so its sha256) differ. Lookups scan all entries;
+    at a few thousand entries that is well under a millisecond. A
+    max_distance of 0 or less disables the index.
+    """
+
+    def __init__(self, max_entries=4096, max_distance=0):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.enabled = max_distance > 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0}
+
+    def find(self, value):
+        """Cache key stored for the nearest hash within max_distance bits, or None."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            best = None
+            for seen, key in self._entries.items():
+                distance = hamming(value, seen)
+                if distance <= self.max_distance and (best is None or distance < best[0]):
+                    best = (distance, seen, key)
+            if best is None:
+                self.counters['misses'] += 1
+                return None
+            self._entries.move_to_end(best[1])
+            self.counters['hits'] += 1
+            return best[2]
+
+    def add(self, value, key):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[value] = key
+            self._entries.move_to_end(value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {'enabled': self.enabled, 'entries': len(self._entries), **self.counters}
@@ -0,0 +1,88 @@
+import io
+import threading
+
+import numpy as np
+import tensorflow as tf
+
+
+def load_cnn(model_path, content=None):
+    """Load the face CNN: a Keras .h5 or a converted .tflite file.
+
+    content, when given, holds the file's bytes (e.g. mapped by the gunicorn
+    master before fork) and is parsed instead of reading model_path; Keras
+    still copies the weights into its own tensors. .tflite files ignore it:
+    TFLite maps model_path itself, which costs no private copy, while
+    model_content would need one.
+    """
+    if model_path.endswith('.tflite'):
+        return TFLiteModel(model_path)
+    if content is not None:
+        import h5py
+        with h5py.File(io.BytesIO(content), 'r') as f:
+            return tf.keras.models.load_model(f, compile=False)
+    return tf.keras.models.load_model(model_path, compile=False)
+
+
+def convert_to_int8(keras_model, calibration_batches, output_path):
+    """Full-integer TFLite conversion of a Keras model.
+
+    calibration_batches is an iterable of preprocessed float32 batches
+    (N, H, W, 3) in [0, 1], ideally real face crops; the converter uses
+    them to pick activation ranges. Input and output stay float32 so the
+    result is a drop-in for the Keras model.
+    """
+    def representative_dataset():
+        for batch in calibration_batches:
+            for sample in batch:
+                yield [sample[np.newaxis].astype(np.float32)]
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(keras_model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    with open(output_path, 'wb') as f:
+        f.write(converter.convert())
+    return output_path
+
+
+class TFLiteModel:
+    """A .tflite model behind the subset of the Keras API the detectors use.
+
+    The interpreter is resized to each batch shape on demand and guarded by
+    a lock, since a tf.lite.Interpreter can't be invoked concurrently.
+    """
+
+    def __init__(self, model_path, num_threads=None):
+        self.model_path = model_path
+        self.interpreter = tf.lite.Interpreter(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self.input_details = self.interpreter.get_input_details()[0]
+        self.output_details = self.interpreter.get_output_details()[0]
+        self._shape = tuple(self.input_details['shape'])
+        self._lock = threading.Lock()
+
+    def _quantize(self, batch):
+        dtype = self.input_details['dtype']
+        scale, zero_point = self.input_details['quantization']
+        if dtype == np.float32 or not scale:
+            return batch.astype(np.float32, copy=False)
+        info = np.iinfo(dtype)
+        return np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(dtype)
+
+    def _dequantize(self, output):
+        scale, zero_point = self.output_details['quantization']
+        if output.dtype == np.float32 or not scale:
+            return output.astype(np.float32, copy=False)
+        return (output.astype(np.float32) - zero_point) * scale
+
+    def predict(self, batch, batch_size=None, verbose=0):
+        batch = np.ascontiguousarray(batch)
+        with self._lock:
+            if tuple(batch.shape) != self._shape:
+                self.interpreter.resize_tensor_input(self.input_details['index'], batch.shape)
+                self.interpreter.allocate_tensors()
+                self._shape = tuple(batch.shape)
+            self.interpreter.set_tensor(self.input_details['index'], self._quantize(batch))
+            self.interpreter.invoke()
+            output = self.interpreter.get_tensor(self.output_details['index'])
+        return self._dequantize(output)
@@ -0,0 +1,203 @@
+import queue
+import threading
+import time
+
+from .perceptual_hash import FrameDeduplicator
+
+# Marks the end of a stage's output
+_DONE = object()
+
+
+class VideoPipeline:
+    """Runs decode -> face detection -> inference as overlapping stages.
+
+    Each stage is a worker thread connected to the next by a bounded queue,
+    so at most ``queue_size`` frames (plus one inference batch) are held in
+    memory regardless of how many frames are sampled. Inference does not
+    wait for a full max_batch_size batch: once ``min_batch_size`` faces are
+    pending and detection has nothing more ready, they are run, so the
+    model works alongside face detection. Busy time per stage is
+    reported under ``stage_timings`` in the result. Frames that look like an
+    already-scored frame (dHash) skip detection and inference and reuse its
+    score.
+    """
+
+    def __init__(self, detector, queue_size=8, max_frames=32, strategy='auto', progress=None, min_batch_size=8):
+        self.detector = detector
+        self.progress = progress
+        self.queue_size = queue_size
+        self.min_batch_size = min(min_batch_size, detector.max_batch_size)
+        self.max_frames = max_frames
+        self.strategy = strategy
+
+        self.frames = queue.Queue(maxsize=queue_size)
+        self.faces = queue.Queue(maxsize=queue_size)
+        self.stop = threading.Event()
+        self.tracker = detector.new_tracker()
+        self.dedup = FrameDeduplicator(detector.frame_dedup_distance)
+        self.position = 0
+        self.decoded = threading.Event()
+        self.errors = []
+        self.timings = {'decode': 0.0, 'face_detection': 0.0, 'inference': 0.0}
+
+        # Scores by frame position; duplicates point at the position they reuse
+        self.scored = {}
+        self.duplicates = {}
+        self.counts = {'frames_decoded': 0, 'faces_detected': 0, 'batches_inferred': 0}
+
+    def _report(self, stage, increment=1):
+        # Totals are estimates from the sampling budget until decode finishes
+        self.counts[stage] += increment
+        if self.progress is None:
+            return
+        frames = self.counts['frames_decoded'] if self.decoded.is_set() else self.max_frames
+        totals = {
+            'frames_decoded': self.max_frames,
+            'faces_detected': frames,
+            # Upper bound: batches hold min_batch_size to max_batch_size faces
+            'batches_inferred': -(-frames // self.min_batch_size),
+        }
+        self.progress(stage, self.counts[stage], totals[stage])
+
+    def _put(self, q, item):
+        # Give up if another stage failed so we never block on a dead consumer
+        while not self.stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q):
+        while not self.stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _fail(self, stage, e):
+        print(f"Error in {stage} stage: {str(e)}")
+        self.errors.append(e)
+        self.stop.set()
+
+    def _decode(self, video_path):
+        try:
+            frames = self.detector.iter_frames(video_path, self.max_frames, self.strategy)
+            while True:
+                start = time.perf_counter()
+                frame = next(frames, _DONE)
+                self.timings['decode'] += time.perf_counter() - start
+                if frame is _DONE:
+                    self.decoded.set()
+                else:
+                    self._report('frames_decoded')
+                if not self._put(self.frames, frame) or frame is _DONE:
+                    break
+        except Exception as e:
+            self._fail('decode', e)
+
+    def _next_frames(self):
+        # Block for one frame, then take whatever else is already decoded so
+        # a face detection pool gets enough frames to spread across workers
+        frame = self._get(self.frames)
+        if frame is _DONE:
+            return [], True
+
+        group = [frame]
+        pool = self.detector.face_pool
+        limit = pool.workers if pool is not None and self.tracker is None else 1
+        while len(group) < limit:
+            try:
+                frame = self.frames.get_nowait()
+            except queue.Empty:
+                break
+            if frame is _DONE:
+                return group, True
+            group.append(frame)
+        return group, False
+
+    def _detect(self):
+        try:
+            while True:
+                group, done = self._next_frames()
+                if group:
+                    start = time.perf_counter()
+                    positions = range(self.position, self.position + len(group))
+                    self.position += len(group)
+                    sources = [self.dedup.match(frame, position) for frame, position in zip(group, positions)]
+                    unique = [frame for frame, source in zip(group, sources) if source is None]
+                    crops = iter(self.detector.detect_and_crop_faces(unique, self.tracker) if unique else [])
+                    self.timings['face_detection'] += time.perf_counter() - start
+                    self._report('faces_detected', len(group))
+                    for position, source in zip(positions, sources):
+                        item = (position, next(crops)) if source is None else (position, source)
+                        if not self._put(self.faces, item):
+                            return
+                if done:
+                    self._put(self.faces, _DONE)
+                    break
+        except Exception as e:
+            self._fail('face detection', e)
+
+    def _flush(self, batch):
+        start = time.perf_counter()
+        probabilities = self.detector.predict_faces([face for _, (face, _) in batch])
+        for (position, (_, face_detected)), probability in zip(batch, probabilities):
+            is_fake, confidence = self.detector.score(probability)
+            self.scored[position] = (is_fake, confidence, face_detected)
+        self.timings['inference'] += time.perf_counter() - start
+        self._report('batches_inferred')
+
+    def _infer(self):
+        try:
+            batch = []
+            while True:
+                item = self._get(self.faces)
+                if item is _DONE:
+                    break
+                position, crop = item
+                if isinstance(crop, int):
+                    # Near-duplicate of an earlier frame: reuse its score
+                    self.duplicates[position] = crop
+                    continue
+                batch.append(item)
+                # Run what we have once detection has nothing else ready,
+                # rather than waiting for it to fill a whole batch
+                if (len(batch) >= self.detector.max_batch_size
+                        or (len(batch) >= self.min_batch_size and self.faces.empty())):
+                    self._flush(batch)
+                    batch = []
+            if batch and not self.stop.is_set():
+                self._flush(batch)
+        except Exception as e:
+            self._fail('inference', e)
+
+    def run(self, video_path):
+        start = time.perf_counter()
+        workers = [
+            threading.Thread(target=self._decode, args=(video_path,), name='pipeline-decode', daemon=True),
+            threading.Thread(target=self._detect, name='pipeline-detect', daemon=True),
+            threading.Thread(target=self._infer, name='pipeline-infer', daemon=True),
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        if self.errors:
+            raise self.errors[0]
+        if not self.scored:
+            raise ValueError("No frames could be extracted from the video")
+
+        rows = [self.scored[self.duplicates.get(position, position)] for position in range(self.position)]
+        predictions, confidences, faces_detected = (list(column) for column in zip(*rows))
+        result = self.detector.summarize(predictions, confidences, faces_detected)
+        result['frames_deduplicated'] = self.dedup.skipped
+        timings = {stage: round(seconds, 4) for stage, seconds in self.timings.items()}
+        timings['total'] = round(time.perf_counter() - start, 4)
+        result['stage_timings'] = timings
+        if self.tracker is not None:
+            result['face_tracking'] = self.tracker.stats()
+        return result
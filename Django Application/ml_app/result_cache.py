@@ -0,0 +1,170 @@
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from .utils import json_default
+
+
+class StreamingHasher:
+    """sha256 of an upload, fed chunk by chunk while it is being written."""
+
+    def __init__(self):
+        self._hash = hashlib.sha256()
+        self.size = 0
+
+    def update(self, chunk):
+        self._hash.update(chunk)
+        self.size += len(chunk)
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+
+def model_version(model_path):
+    """Identify a model artifact by name, size and modification time."""
+    try:
+        stat = os.stat(model_path)
+        return f"{os.path.basename(model_path)}:{stat.st_size}:{int(stat.st_mtime)}"
+    except OSError:
+        return os.path.basename(str(model_path))
+
+
+class ResultCache:
+    """Two-tier cache of analysis results keyed by upload hash and model parameters.
+
+    The first tier is an in-process LRU. The second is a small sqlite table
+    shared by all workers on the host. Both tiers expire entries after
+    ``ttl`` seconds; the sqlite tier also evicts least recently used rows
+    once it holds more than ``max_entries``. Eviction runs every
+    ``evict_interval`` writes rather than on each one, so the table may
+    briefly run that many rows over. Callers get their own copy of a
+    result and may modify it.
+    """
+
+    def __init__(self, db_path, memory_entries=1024, max_entries=100000, ttl=7 * 24 * 3600, evict_interval=256):
+        self.db_path = db_path
+        self.memory_entries = memory_entries
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.evict_interval = evict_interval
+        self._writes = 0
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+        self._connection().execute(
+            'CREATE TABLE IF NOT EXISTS result_cache ('
+            ' key TEXT PRIMARY KEY,'
+            ' result TEXT NOT NULL,'
+            ' created REAL NOT NULL,'
+            ' accessed REAL NOT NULL)'
+        )
+        self._connection().execute('CREATE INDEX IF NOT EXISTS result_cache_accessed ON result_cache (accessed)')
+        self._connection().commit()
+
+    def _connection(self):
+        # sqlite connections can't be shared across threads
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=5)
+            self._local.connection = connection
+        return connection
+
+    def make_key(self, content_hash, **params):
+        params = json.dumps(params, sort_keys=True, default=str)
+        return hashlib.sha256(f"{content_hash}|{params}".encode()).hexdigest()
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created, result = entry
+                if now - created <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self.counters['memory_hits'] += 1
+                    return copy.deepcopy(result)
+                del self._memory[key]
+
+        try:
+            connection = self._connection()
+            row = connection.execute(
+                'SELECT result, created FROM result_cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is not None and now - row[1] <= self.ttl:
+                connection.execute('UPDATE result_cache SET accessed = ? WHERE key = ?', (now, key))
+                connection.commit()
+                result = json.loads(row[0])
+                self._remember(key, row[1], copy.deepcopy(result))
+                self._count('disk_hits')
+                return result
+        except sqlite3.Error as e:
+            print(f"Error reading result cache: {str(e)}")
+
+        self._count('misses')
+        return None
+
+    def _remember(self, key, created, result):
+        with self._lock:
+            self._memory[key] = (created, result)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def set(self, key, result):
+        now = time.time()
+        self._remember(key, now, copy.deepcopy(result))
+        with self._lock:
+            self.counters['stores'] += 1
+            self._writes += 1
+            due = self._writes % self.evict_interval == 0
+        try:
+            connection = self._connection()
+            connection.execute(
+                'INSERT OR REPLACE INTO result_cache (key, result, created, accessed) VALUES (?, ?, ?, ?)',
+                (key, json.dumps(result, default=json_default), now, now),
+            )
+            connection.commit()
+            if due:
+                self.evict()
+        except sqlite3.Error as e:
+            print(f"Error writing result cache: {str(e)}")
+
+    def evict(self):
+        connection = self._connection()
+        expired = connection.execute(
+            'DELETE FROM result_cache WHERE created < ?', (time.time() - self.ttl,)
+        ).rowcount
+        overflow = 0
+        excess = connection.execute('SELECT COUNT(*) FROM result_cache').fetchone()[0] - self.max_entries
+        if excess > 0:
+            # Walks the accessed index for just the excess rows, no full sort
+            overflow = connection.execute(
+                'DELETE FROM result_cache WHERE key IN ('
+                ' SELECT key FROM result_cache ORDER BY accessed LIMIT ?)',
+                (excess,),
+            ).rowcount
+        connection.commit()
+        if expired or overflow:
+            with self._lock:
+                self.counters['evictions'] += expired + overflow
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+            counters['memory_entries'] = len(self._memory)
+        hits = counters['memory_hits'] + counters['disk_hits']
+        lookups = hits + counters['misses']
+        counters['hit_rate'] = hits / lookups if lookups else 0
+        return counters
@@ -0,0 +1,151 @@
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.conf import settings
+
+
+class NotReady(Exception):
+    """Raised when the detectors are still loading (or failed to load)."""
+
+
+class Runtime:
+    """Detectors and shared inference state, built on first use.
+
+    Importing ml_app keeps clear of TensorFlow, MTCNN and the models, so
+    manage.py commands and health checks start fast. ``start`` loads and
+    warms everything up on a background thread; requests that need a
+    detector call ``wait``. State moves idle -> loading -> warming_up ->
+    ready (or failed), and each phase is timed for ``status``.
+    """
+
+    def __init__(self):
+        self.state = 'idle'
+        self.error = None
+        self.timings = OrderedDict()
+        self.video_detector = None
+        self.image_detector = None
+        # Only built when settings.AUDIO_MODEL_PATH is set
+        self.audio_detector = None
+        # Only built when settings.MEL_MODEL_PATH is set
+        self.mel_detector = None
+        self.inference_scheduler = None
+        self._started = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def record(self, phase, seconds):
+        self.timings[phase] = round(seconds, 3)
+
+    @contextmanager
+    def _phase(self, phase):
+        start = time.perf_counter()
+        yield
+        self.record(phase, time.perf_counter() - start)
+        print(f"Startup: {phase} took {self.timings[phase]:.3f}s")
+
+    def start(self):
+        """Begin loading in the background; safe to call repeatedly."""
+        with self._lock:
+            if self.state != 'idle':
+                return self
+            self.state = 'loading'
+            self._started = time.perf_counter()
+        threading.Thread(target=self._initialize, name='ml-runtime-startup', daemon=True).start()
+        return self
+
+    def wait(self, timeout=None):
+        """Block until the detectors are ready, starting them if needed."""
+        self.start()
+        self._done.wait(timeout)
+        if self.state != 'ready':
+            raise NotReady(self.error or f"Models are still loading ({self.state})")
+        return self
+
+    def _initialize(self):
+        try:
+            with self._phase('import'):
+                from .models.audio_detector import AudioDeepfakeDetector
+                from .models.detector2 import DeepfakeDetector
+                from .models.face_detection_pool import FaceDetectionPool
+                from .models.image_detector import ImageDeepfakeDetector
+                from .models.inference_server import InferenceScheduler
+                from .models.mel_detector import MelSpectrogramDetector
+                from .models.model_registry import registry
+
+            with self._phase('load_models'):
+                registry.preload(settings.MODEL_PATHS)
+
+            with self._phase('build_detectors'):
+                # Both detectors name the same file, so the model registry loads it once
+                video_detector = DeepfakeDetector(
+                    model_path=settings.CNN_MODEL_PATH,
+                    detection_max_side=settings.FACE_DETECTION_MAX_SIDE,
+                    min_face_size=settings.FACE_DETECTION_MIN_FACE_SIZE,
+                    track_interval=settings.FACE_TRACK_INTERVAL,
+                    multi_face=settings.FACE_MULTI_FACE,
+                    frame_dedup_distance=settings.FRAME_DEDUP_DISTANCE,
+                )
+                image_detector = ImageDeepfakeDetector(model_path=settings.CNN_MODEL_PATH)
+                audio_detector = None
+                if settings.AUDIO_MODEL_PATH:
+                    audio_detector = AudioDeepfakeDetector(model_path=settings.AUDIO_MODEL_PATH)
+                mel_detector = None
+                if settings.MEL_MODEL_PATH:
+                    mel_detector = MelSpectrogramDetector(settings.MEL_MODEL_PATH, loader=registry.get)
+
+                # Both detectors use the same CNN, so face crops from concurrent video and
+                # image requests are coalesced into shared forward passes
+                scheduler = InferenceScheduler(video_detector.run_model, max_batch_size=32, max_wait_ms=5)
+
+                if settings.FACE_DETECTION_WORKERS > 0:
+                    video_detector.face_pool = FaceDetectionPool(workers=settings.FACE_DETECTION_WORKERS)
+
+            self.state = 'warming_up'
+            with self._phase('warm_up_video_detector'):
+                video_detector.warm_up()
+            with self._phase('warm_up_image_detector'):
+                image_detector.warm_up()
+            if audio_detector is not None:
+                with self._phase('warm_up_audio_detector'):
+                    audio_detector.warm_up()
+            if mel_detector is not None:
+                with self._phase('warm_up_mel_detector'):
+                    mel_detector.warm_up()
+            if video_detector.face_pool is not None:
+                with self._phase('warm_up_face_pool'):
+                    video_detector.face_pool.warm_up()
+
+            # Attach the scheduler last, so warm-up ran against the models directly
+            video_detector.scheduler = scheduler
+            image_detector.scheduler = scheduler
+            self.video_detector = video_detector
+            self.image_detector = image_detector
+            self.audio_detector = audio_detector
+            self.mel_detector = mel_detector
+            self.inference_scheduler = scheduler
+            self.state = 'ready'
+
+        except Exception as e:
+            print(f"Error initializing detectors: {str(e)}")
+            print(traceback.format_exc())
+            self.error = str(e)
+            self.state = 'failed'
+
+        finally:
+            self.record('total', time.perf_counter() - self._started)
+            self._done.set()
+
+    def status(self):
+        return {
+            'state': self.state,
+            'ready': self.state == 'ready',
+            'error': self.error,
+            'startup_seconds': dict(self.timings),
+        }
+
+
+# One runtime per process; started after fork (wsgi.py), by /readyz or by the first request
+runtime = Runtime()
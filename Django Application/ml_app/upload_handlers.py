@@ -0,0 +1,28 @@
+from django.core.files.uploadhandler import FileUploadHandler
+
+from .result_cache import StreamingHasher
+
+
+class HashingUploadHandler(FileUploadHandler):
+    """Hashes each uploaded file as Django receives it.
+
+    Chunks are passed through unchanged to the memory/temporary-file
+    handlers that follow, and the sha256 ends up in
+    ``request.upload_hashes[field_name]``. The views then never need to
+    read an upload a second time just to build its cache key.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.hasher = StreamingHasher()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.hasher.update(raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        hashes = getattr(self.request, 'upload_hashes', {})
+        hashes[self.field_name] = self.hasher.hexdigest()
+        self.request.upload_hashes = hashes
+        # Let the next handler build the actual file object
+        return None
@@ -4,4 +4,12 @@ from . import views
 urlpatterns = [
     path('api/analyze/', views.analyze_video, name='analyze_video'),
     path('api/analyze-image/', views.analyze_image, name='analyze_image'),
+    path('api/analyze-images/', views.analyze_images, name='analyze_images'),
+    path('api/analyze-audio/', views.analyze_audio, name='analyze_audio'),
+    path('api/jobs/video/', views.submit_video_job, name='submit_video_job'),
+    path('api/jobs/<str:job_id>/', views.job_status, name='job_status'),
+    path('api/inference-metrics/', views.inference_metrics, name='inference_metrics'),
+    path('api/cache-metrics/', views.cache_metrics, name='cache_metrics'),
+    path('healthz', views.healthz, name='healthz'),
+    path('readyz', views.readyz, name='readyz'),
 ]
\ No newline at end of file
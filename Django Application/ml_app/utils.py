@@ -1,27 +1,27 @@
 import cv2
-import torch
-import numpy as np
-from torchvision import transforms
+from .models.frame_sampler import FrameSampler
 
-def extract_frames(video_path, num_frames=20):
+def json_default(value):
+    """json.dumps default for detector results (numpy scalars/arrays)."""
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
+
+def extract_frames(video_path, num_frames=20, strategy='auto'):
     """Extract frames from video for analysis."""
-    cap = cv2.VideoCapture(video_path)
-    frames = []
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    frame_indices = np.linspace(0, total_frames-1, num_frames, dtype=int)
-    
-    for idx in frame_indices:
-        cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
-        ret, frame = cap.read()
-        if ret:
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            frames.append(frame)
-    
-    cap.release()
-    return frames
+    return list(iter_frames(video_path, num_frames, strategy))
+
+def iter_frames(video_path, num_frames=20, strategy='auto'):
+    """Yield sampled RGB frames, decoding sequentially or seeking as is cheaper."""
+    sampler = FrameSampler(num_frames=num_frames, strategy=strategy)
+    for _, frame in sampler.frames(video_path):
+        yield cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
 
 def preprocess_frames(frames):
     """Preprocess frames for model input."""
+    import torch
+    from torchvision import transforms
+
     transform = transforms.Compose([
         transforms.ToPILImage(),
         transforms.Resize((224, 224)),
@@ -38,6 +38,8 @@ def preprocess_frames(frames):
 
 def analyze_video_frames(model, frames):
     """Run model prediction on preprocessed frames."""
+    import torch
+
     model.eval()
     with torch.no_grad():
         outputs = model(frames.unsqueeze(0))
@@ -1,19 +1,142 @@
+import hashlib
 import os
 import traceback
+import uuid
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+import numpy as np
 from django.conf import settings
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from .models.detector2 import DeepfakeDetector
-from .models.image_detector import ImageDeepfakeDetector
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
-from .models.audio_detector import AudioDeepfakeDetector
+from .result_cache import ResultCache, StreamingHasher, model_version
+from .jobs import JobManager
+from .runtime import NotReady, runtime
+from .models.perceptual_hash import RecentHashIndex, phash
 
-# Initialize detectors (no model path needed for mock version)
-video_detector = DeepfakeDetector()
-image_detector = ImageDeepfakeDetector()
+# Detectors are loaded and warmed up by ml_app.runtime, not at import time
+
+# Repeated uploads of the same bytes are served from here without decoding
+result_cache = ResultCache(
+    settings.RESULT_CACHE_PATH,
+    memory_entries=settings.RESULT_CACHE_MEMORY_ENTRIES,
+    max_entries=settings.RESULT_CACHE_MAX_ENTRIES,
+    ttl=settings.RESULT_CACHE_TTL,
+)
+
+# Re-encoded copies of recent images (different bytes, same picture) are
+# found by perceptual hash and served from the result cache
+image_hashes = RecentHashIndex(
+    max_entries=settings.IMAGE_HASH_INDEX_SIZE,
+    max_distance=settings.IMAGE_HASH_MAX_DISTANCE,
+)
+
+# Decodes and resizes images for /api/analyze-images/; OpenCV releases the
+# GIL, so these threads run in parallel (they start on first use)
+image_decode_pool = ThreadPoolExecutor(max_workers=settings.IMAGE_DECODE_WORKERS, thread_name_prefix='image-decode')
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tif', '.tiff')
+
+# Long videos can be analyzed in the background and polled for progress. Job
+# state goes to the result cache's sqlite file, so any server worker can
+# answer a poll
+analysis_jobs = JobManager(
+    workers=settings.ANALYSIS_JOB_WORKERS,
+    retention=settings.ANALYSIS_JOB_RETENTION,
+    db_path=settings.RESULT_CACHE_PATH,
+    stale_after=settings.ANALYSIS_JOB_STALE_AFTER,
+)
+
+def cache_key(detector, content_hash, **options):
+    """options are per-request overrides of the detector's cache_params."""
+    params = {**detector.cache_params(), **options}
+    return result_cache.make_key(content_hash, model=model_version(detector.model_path), **params)
+
+def flag(request, name, default):
+    """Boolean request option from the query string or form data."""
+    value = request.query_params.get(name, request.data.get(name))
+    if value is None:
+        return default
+    return str(value).lower() in ('1', 'true', 'yes', 'on')
+
+class InvalidOption(ValueError):
+    """A request option that can't be used; answered with a 400."""
+
+def video_options(request, detector):
+    """Per-request analysis options for video views (also part of the cache key)."""
+    options = {
+        # multi_face=1 analyzes every face and reports per-identity tracks
+        'multi_face': flag(request, 'multi_face', detector.multi_face),
+        # adaptive=1 samples coarse to fine and stops once the verdict is settled
+        'adaptive': flag(request, 'adaptive', False),
+    }
+    if options['adaptive']:
+        for name in ('min_frames', 'max_frames'):
+            value = request.query_params.get(name, request.data.get(name))
+            if not value:
+                options[name] = None
+            elif not str(value).isdigit() or int(value) <= 0:
+                raise InvalidOption(f"{name} must be a positive integer")
+            elif int(value) > settings.ADAPTIVE_MAX_FRAMES:
+                raise InvalidOption(f"{name} must be at most {settings.ADAPTIVE_MAX_FRAMES}")
+            else:
+                options[name] = int(value)
+        if options['min_frames'] and options['max_frames'] and options['min_frames'] > options['max_frames']:
+            raise InvalidOption("min_frames must not be larger than max_frames")
+    return options
+
+def not_ready_response(error):
+    return Response({'error': str(error), **runtime.status()}, status=503, headers={'Retry-After': '5'})
+
+def save_upload(upload, temp_path):
+    """Write an upload to temp_path and return the sha256 of its bytes."""
+    # Hash the upload while it is written so a repeat skips analysis
+    hasher = StreamingHasher()
+    with open(temp_path, 'wb+') as destination:
+        for chunk in upload.chunks():
+            hasher.update(chunk)
+            destination.write(chunk)
+    return hasher.hexdigest()
+
+def upload_hash(request, upload):
+    """sha256 computed by HashingUploadHandler, or hashed here as a fallback."""
+    content_hash = getattr(request, 'upload_hashes', {}).get('file')
+    if content_hash is None:
+        hasher = StreamingHasher()
+        for chunk in upload.chunks():
+            hasher.update(chunk)
+        content_hash = hasher.hexdigest()
+    return content_hash
+
+@contextmanager
+def upload_path(upload):
+    """Filesystem path for an upload, without copying it when Django spooled it to disk."""
+    if hasattr(upload, 'temporary_file_path'):
+        yield upload.temporary_file_path()
+        return
+
+    # Small uploads live in memory; OpenCV needs a path, so write a uniquely
+    # named copy rather than MEDIA_ROOT/temp/<original name>
+    suffix = os.path.splitext(upload.name)[1]
+    handle, temp_path = tempfile.mkstemp(suffix=suffix)
+    try:
+        with os.fdopen(handle, 'wb') as destination:
+            for chunk in upload.chunks():
+                destination.write(chunk)
+        yield temp_path
+    finally:
+        remove_temp(temp_path)
+
+def remove_temp(temp_path):
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+        print(f"Temporary file removed: {temp_path}")
 
 @api_view(['POST'])
 def analyze_video(request):
@@ -22,30 +145,28 @@ def analyze_video(request):
         if not video_file:
             return Response({'error': 'No video file provided'}, status=400)
 
-        # Create temp directory if it doesn't exist
-        temp_dir = os.path.join(settings.MEDIA_ROOT, 'temp')
-        os.makedirs(temp_dir, exist_ok=True)
-
-        # Save the uploaded file temporarily
-        temp_path = os.path.join(temp_dir, video_file.name)
-        print(f"Saving video to temporary path: {temp_path}")
-        
-        with open(temp_path, 'wb+') as destination:
-            for chunk in video_file.chunks():
-                destination.write(chunk)
+        video_detector = runtime.wait(settings.MODEL_READY_TIMEOUT).video_detector
+        options = video_options(request, video_detector)
+        key = cache_key(video_detector, upload_hash(request, video_file), **options)
+        result = result_cache.get(key)
+        if result is not None:
+            print(f"Cache hit for {video_file.name}, skipping analysis")
+            return Response(result, headers={'X-Cache': 'HIT'})
 
-        print(f"Video saved successfully, starting analysis...")
-        
-        # Analyze the video
-        result = video_detector.predict(temp_path)
+        # Analyze the video where Django already put it
+        with upload_path(video_file) as video_path:
+            print(f"Starting analysis of {video_path}")
+            result = video_detector.predict(video_path, **options)
         print(f"Analysis complete: {result}")
+        result_cache.set(key, result)
 
-        # Clean up
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-            print(f"Temporary file removed: {temp_path}")
+        return Response(result, headers={'X-Cache': 'MISS'})
+
+    except InvalidOption as e:
+        return Response({'error': str(e)}, status=400)
 
-        return Response(result)
+    except NotReady as e:
+        return not_ready_response(e)
 
     except Exception as e:
         print(f"Error in analyze_video: {str(e)}")
@@ -55,6 +176,22 @@ def analyze_video(request):
             'detail': traceback.format_exc()
         }, status=500)
 
+def near_duplicate_result(perceptual_hash, image):
+    """Cached result of a recent near-identical image with the same dimensions, or None.
+
+    Off unless IMAGE_HASH_MAX_DISTANCE > 0: a face swap on an already
+    scanned photo changes only a small region, so it hashes close to the
+    original and would get the original's verdict.
+    """
+    if not image_hashes.enabled:
+        return None
+    near_key = image_hashes.find(perceptual_hash)
+    result = result_cache.get(near_key) if near_key is not None else None
+    if result is None or result['image_size'][:2] != list(image.shape[:2]):
+        return None
+    # Describe this upload, not the one the verdict was computed for
+    return {**result, 'image_size': [*image.shape[:2], image.shape[2] if image.ndim == 3 else 1]}
+
 @api_view(['POST'])
 def analyze_image(request):
     try:
@@ -62,30 +199,37 @@ def analyze_image(request):
         if not image_file:
             return Response({'error': 'No image file provided'}, status=400)
 
-        # Create temp directory if it doesn't exist
-        temp_dir = os.path.join(settings.MEDIA_ROOT, 'temp')
-        os.makedirs(temp_dir, exist_ok=True)
+        image_detector = runtime.wait(settings.MODEL_READY_TIMEOUT).image_detector
+        key = cache_key(image_detector, upload_hash(request, image_file))
+        result = result_cache.get(key)
+        if result is not None:
+            print(f"Cache hit for {image_file.name}, skipping analysis")
+            return Response(result, headers={'X-Cache': 'HIT'})
 
-        # Save the uploaded file temporarily
-        temp_path = os.path.join(temp_dir, image_file.name)
-        print(f"Saving image to temporary path: {temp_path}")
-        
-        with open(temp_path, 'wb+') as destination:
-            for chunk in image_file.chunks():
-                destination.write(chunk)
+        if hasattr(image_file, 'temporary_file_path'):
+            image = image_detector.read_image(image_file.temporary_file_path())
+        else:
+            # Decode straight from the in-memory upload buffer
+            image = image_detector.decode_image(image_file.file.getbuffer())
+
+        perceptual_hash = phash(image)
+        result = near_duplicate_result(perceptual_hash, image)
+        if result is not None:
+            print(f"Near-duplicate of a cached image: {image_file.name}")
+            # Also remember these exact bytes
+            result_cache.set(key, result)
+            return Response(result, headers={'X-Cache': 'NEAR-HIT'})
 
-        print(f"Image saved successfully, starting analysis...")
-        
         # Analyze the image
-        result = image_detector.predict(temp_path)
+        result = image_detector.predict_image(image)
         print(f"Analysis complete: {result}")
+        result_cache.set(key, result)
+        image_hashes.add(perceptual_hash, key)
 
-        # Clean up
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-            print(f"Temporary file removed: {temp_path}")
+        return Response(result, headers={'X-Cache': 'MISS'})
 
-        return Response(result)
+    except NotReady as e:
+        return not_ready_response(e)
 
     except Exception as e:
         print(f"Error in analyze_image: {str(e)}")
@@ -93,4 +237,225 @@ def analyze_image(request):
         return Response({
             'error': str(e),
             'detail': traceback.format_exc()
-        }, status=500)
\ No newline at end of file
+        }, status=500)
+
+def batch_images(request):
+    """(name, read) for every uploaded image, with zip uploads expanded.
+
+    Nothing is read or decompressed here: read() returns the bytes and is
+    called in the decode pool, so the file count can be checked first.
+    Oversized files and unreadable archives come back as (name, exception)
+    and are reported per item.
+    """
+    too_large = ValueError(f"Image larger than {settings.BATCH_IMAGE_MAX_BYTES} bytes")
+    items = []
+    for upload in request.FILES.getlist('files') + request.FILES.getlist('file'):
+        if not upload.name.lower().endswith('.zip'):
+            items.append((upload.name, too_large if upload.size > settings.BATCH_IMAGE_MAX_BYTES else upload.read))
+            continue
+        try:
+            archive = zipfile.ZipFile(upload)
+        except zipfile.BadZipFile as e:
+            items.append((upload.name, ValueError(f"Not a valid zip archive: {str(e)}")))
+            continue
+        for member in archive.infolist():
+            if member.is_dir() or not member.filename.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            name = f"{upload.name}/{member.filename}"
+            if member.file_size > settings.BATCH_IMAGE_MAX_BYTES:
+                items.append((name, too_large))
+            else:
+                # ZipFile serializes concurrent member reads on the shared upload
+                items.append((name, partial(archive.read, member)))
+    return items
+
+def prepare_batch_image(image_detector, source):
+    """Read, cache lookups, decode and preprocessing for one image (runs in image_decode_pool)."""
+    if isinstance(source, Exception):
+        raise source
+    data = source()
+    key = cache_key(image_detector, hashlib.sha256(data).hexdigest())
+    result = result_cache.get(key)
+    if result is not None:
+        return {'key': key, 'result': result, 'cache': 'HIT'}
+
+    image, processed = image_detector.prepare(data)
+    perceptual_hash = phash(image)
+    result = near_duplicate_result(perceptual_hash, image)
+    if result is not None:
+        result_cache.set(key, result)
+        return {'key': key, 'result': result, 'cache': 'NEAR-HIT'}
+    # Only the shape is needed from here on, so the decoded image is freed
+    # now rather than held until the whole batch has been inferred
+    return {'key': key, 'shape': image.shape, 'processed': processed, 'phash': perceptual_hash, 'cache': 'MISS'}
+
+@api_view(['POST'])
+def analyze_images(request):
+    try:
+        image_detector = runtime.wait(settings.MODEL_READY_TIMEOUT).image_detector
+        items = batch_images(request)
+        if not items:
+            return Response({'error': 'No image files provided'}, status=400)
+        if len(items) > settings.BATCH_IMAGE_MAX_FILES:
+            return Response({'error': f"At most {settings.BATCH_IMAGE_MAX_FILES} images per request"}, status=400)
+
+        futures = [image_decode_pool.submit(prepare_batch_image, image_detector, source) for _, source in items]
+        entries = []
+        for (name, _), future in zip(items, futures):
+            try:
+                entries.append(future.result())
+            except Exception as e:
+                # A bad file only fails its own entry
+                entries.append({'error': str(e) or type(e).__name__})
+
+        # Every image that needs the model goes through it in full batches
+        misses = [entry for entry in entries if entry.get('cache') == 'MISS']
+        if misses:
+            probabilities = image_detector.predict_batch(np.stack([entry.pop('processed') for entry in misses]))
+            for entry, probability in zip(misses, probabilities):
+                entry['result'] = image_detector.describe(entry['shape'], probability)
+                result_cache.set(entry['key'], entry['result'])
+                image_hashes.add(entry['phash'], entry['key'])
+
+        results = []
+        for (name, _), entry in zip(items, entries):
+            if 'error' in entry:
+                results.append({'name': name, 'error': entry['error']})
+            else:
+                results.append({'name': name, 'cache': entry['cache'], **entry['result']})
+        failed = sum('error' in entry for entry in entries)
+        print(f"Batch analysis complete: {len(items)} images, {len(misses)} inferred, {failed} failed")
+        return Response({
+            'results': results,
+            'total': len(results),
+            'fake': sum(r.get('result') == 'FAKE' for r in results),
+            'failed': failed,
+        })
+
+    except NotReady as e:
+        return not_ready_response(e)
+
+    except Exception as e:
+        print(f"Error in analyze_images: {str(e)}")
+        print(traceback.format_exc())
+        return Response({
+            'error': str(e),
+            'detail': traceback.format_exc()
+        }, status=500)
+
+@api_view(['POST'])
+def analyze_audio(request):
+    try:
+        audio_file = request.FILES.get('file')
+        if not audio_file:
+            return Response({'error': 'No audio file provided'}, status=400)
+
+        # ?model=mel selects the mel-spectrogram detector from the Streamlit app
+        model = request.query_params.get('model', 'mfcc')
+        if model not in ('mfcc', 'mel'):
+            return Response({'error': f"Unknown audio model: {model}"}, status=400)
+        ready = runtime.wait(settings.MODEL_READY_TIMEOUT)
+        audio_detector = ready.mel_detector if model == 'mel' else ready.audio_detector
+        if audio_detector is None:
+            setting = 'MEL_MODEL_PATH' if model == 'mel' else 'AUDIO_MODEL_PATH'
+            return Response({'error': f"Audio analysis is not configured (set {setting})"}, status=503)
+
+        key = cache_key(audio_detector, upload_hash(request, audio_file))
+        result = result_cache.get(key)
+        if result is not None:
+            print(f"Cache hit for {audio_file.name}, skipping analysis")
+            return Response(result, headers={'X-Cache': 'HIT'})
+
+        # Every window of the recording is scored in batched forward passes
+        with upload_path(audio_file) as audio_path:
+            result = audio_detector.predict(audio_path)
+        result_cache.set(key, result)
+
+        return Response(result, headers={'X-Cache': 'MISS'})
+
+    except NotReady as e:
+        return not_ready_response(e)
+
+    except Exception as e:
+        print(f"Error in analyze_audio: {str(e)}")
+        print(traceback.format_exc())
+        return Response({
+            'error': str(e),
+            'detail': traceback.format_exc()
+        }, status=500)
+
+@api_view(['POST'])
+def submit_video_job(request):
+    try:
+        video_file = request.FILES.get('file')
+        if not video_file:
+            return Response({'error': 'No video file provided'}, status=400)
+
+        video_detector = runtime.wait(settings.MODEL_READY_TIMEOUT).video_detector
+        options = video_options(request, video_detector)
+        temp_dir = os.path.join(settings.MEDIA_ROOT, 'temp')
+        os.makedirs(temp_dir, exist_ok=True)
+
+        # The job outlives the request, so give its file a name nobody else uses
+        temp_path = os.path.join(temp_dir, f"{uuid.uuid4().hex}_{os.path.basename(video_file.name)}")
+        content_hash = save_upload(video_file, temp_path)
+
+        key = cache_key(video_detector, content_hash, **options)
+        result = result_cache.get(key)
+        if result is not None:
+            print(f"Cache hit for {content_hash}, skipping analysis")
+            os.remove(temp_path)
+            job = analysis_jobs.completed('video', result)
+            return Response(job.to_dict(), status=202)
+
+        def run(path, progress):
+            result = video_detector.predict(path, progress=progress, **options)
+            result_cache.set(key, result)
+            return result
+
+        job = analysis_jobs.submit('video', run, temp_path, cleanup=lambda: remove_temp(temp_path))
+        print(f"Queued video job {job.id} for {temp_path}")
+        return Response(job.to_dict(), status=202)
+
+    except InvalidOption as e:
+        return Response({'error': str(e)}, status=400)
+
+    except NotReady as e:
+        return not_ready_response(e)
+
+    except Exception as e:
+        print(f"Error in submit_video_job: {str(e)}")
+        print(traceback.format_exc())
+        return Response({
+            'error': str(e),
+            'detail': traceback.format_exc()
+        }, status=500)
+
+@api_view(['GET'])
+def job_status(request, job_id):
+    job = analysis_jobs.get(job_id)
+    if job is None:
+        return Response({'error': 'Job not found'}, status=404)
+    return Response(job.to_dict())
+
+@api_view(['GET'])
+def inference_metrics(request):
+    if runtime.state != 'ready':
+        return Response(runtime.status())
+    from .models.model_registry import registry
+    return Response({**runtime.inference_scheduler.metrics(), 'models': registry.stats()})
+
+@api_view(['GET'])
+def cache_metrics(request):
+    return Response({**result_cache.stats(), 'image_hashes': image_hashes.stats()})
+
+@api_view(['GET'])
+def healthz(request):
+    """Liveness: the process is up and serving requests, models or not."""
+    return Response({'status': 'ok'})
+
+@api_view(['GET'])
+def readyz(request):
+    """Readiness: detectors loaded and warmed up; 503 until then."""
+    runtime.start()
+    return Response(runtime.status(), status=200 if runtime.state == 'ready' else 503)
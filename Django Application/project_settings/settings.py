@@ -94,9 +94,97 @@ CORS_ALLOW_HEADERS = [
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# Hash uploads as they stream in; the default handlers still decide between
+# memory and a temporary file, which the views then analyze in place
+FILE_UPLOAD_HANDLERS = [
+    'ml_app.upload_handlers.HashingUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Worker processes for parallel MTCNN face detection (0 keeps it in-process)
+FACE_DETECTION_WORKERS = int(os.environ.get('FACE_DETECTION_WORKERS', '0'))
+
+# Downscale frames so MTCNN sees at most this many pixels on the longest
+# side (0 detects at full resolution); 'auto' min face size skips faces too
+# small to be worth a 128x128 crop
+FACE_DETECTION_MAX_SIDE = int(os.environ.get('FACE_DETECTION_MAX_SIDE', '0')) or None
+FACE_DETECTION_MIN_FACE_SIZE = os.environ.get('FACE_DETECTION_MIN_FACE_SIZE', '')
+FACE_DETECTION_MIN_FACE_SIZE = (int(FACE_DETECTION_MIN_FACE_SIZE) if FACE_DETECTION_MIN_FACE_SIZE.isdigit()
+                                else FACE_DETECTION_MIN_FACE_SIZE or None)
+
+# Run full face detection every N sampled frames and track the box in
+# between (1 detects on every frame)
+FACE_TRACK_INTERVAL = int(os.environ.get('FACE_TRACK_INTERVAL', '1'))
+
+# Analyze every face in a frame and score per identity track by default
+# (requests can also pass multi_face=1)
+FACE_MULTI_FACE = os.environ.get('FACE_MULTI_FACE', '0') == '1'
+
+# Largest min_frames/max_frames a request may ask adaptive sampling for;
+# each sampled frame is a seek and a decode
+ADAPTIVE_MAX_FRAMES = int(os.environ.get('ADAPTIVE_MAX_FRAMES', '512'))
+
+# Face CNN shared by the video and image detectors; point it at a .tflite
+# file from ml_app/benchmarks/quantize_cnn.py to serve the INT8 model
+CNN_MODEL_PATH = os.environ.get('CNN_MODEL_PATH', os.path.join(BASE_DIR, 'ml_app', 'models', 'cnn_model.h5'))
+
+# Audio model for /api/analyze-audio/ (the endpoint is disabled when unset)
+AUDIO_MODEL_PATH = os.environ.get('AUDIO_MODEL_PATH')
+
+# Mel-spectrogram audio model from the Streamlit app (simple-cnn-ssv.h5),
+# served by /api/analyze-audio/?model=mel when set
+MEL_MODEL_PATH = os.environ.get('MEL_MODEL_PATH')
+
+# Every model artifact the detectors load, for preloading
+MODEL_PATHS = [path for path in (CNN_MODEL_PATH, AUDIO_MODEL_PATH, MEL_MODEL_PATH) if path]
+
+# Map the model files in wsgi.py at import time. Only for gunicorn --preload:
+# the master reads them once instead of every worker reading them. Each
+# worker still builds (and holds) its own copy of the weights
+PRELOAD_MODELS = os.environ.get('PRELOAD_MODELS', '0') == '1'
+
+# Seconds a request waits for the detectors to finish loading before it
+# gets a 503. Loading runs in the background, from the fork of each gunicorn
+# worker (--preload) or from the first /readyz probe or request
+MODEL_READY_TIMEOUT = float(os.environ.get('MODEL_READY_TIMEOUT', '60'))
+
+# Analysis result cache: in-process LRU in front of a sqlite file
+RESULT_CACHE_PATH = os.environ.get('RESULT_CACHE_PATH', os.path.join(BASE_DIR, 'result_cache.sqlite3'))
+RESULT_CACHE_MEMORY_ENTRIES = int(os.environ.get('RESULT_CACHE_MEMORY_ENTRIES', '1024'))
+RESULT_CACHE_MAX_ENTRIES = int(os.environ.get('RESULT_CACHE_MAX_ENTRIES', '100000'))
+RESULT_CACHE_TTL = int(os.environ.get('RESULT_CACHE_TTL', str(7 * 24 * 3600)))
+
+# Perceptual-hash dedup, both off (0) by default.
+# FRAME_DEDUP_DISTANCE > 0 (e.g. 3): sampled video frames within that many
+# dHash bits of a scored frame reuse its score. A whole-frame dHash can't
+# tell the frames of a static talking-head shot apart, so the verdict may
+# rest on a frame or two.
+# IMAGE_HASH_MAX_DISTANCE > 0 (e.g. 4): an image of the same size within
+# that many pHash bits of one of the last IMAGE_HASH_INDEX_SIZE images
+# reuses its cached result. A face swap on an already scanned photo is
+# itself such a near-duplicate.
+FRAME_DEDUP_DISTANCE = int(os.environ.get('FRAME_DEDUP_DISTANCE', '0'))
+IMAGE_HASH_INDEX_SIZE = int(os.environ.get('IMAGE_HASH_INDEX_SIZE', '4096'))
+IMAGE_HASH_MAX_DISTANCE = int(os.environ.get('IMAGE_HASH_MAX_DISTANCE', '0'))
+
+# /api/analyze-images/: decode threads, and limits per request / per image
+IMAGE_DECODE_WORKERS = int(os.environ.get('IMAGE_DECODE_WORKERS', str(os.cpu_count() or 4)))
+BATCH_IMAGE_MAX_FILES = int(os.environ.get('BATCH_IMAGE_MAX_FILES', '1000'))
+BATCH_IMAGE_MAX_BYTES = int(os.environ.get('BATCH_IMAGE_MAX_BYTES', str(20 * 1024 * 1024)))
+
+# Background analysis jobs (no broker: a thread pool in each worker process;
+# job state lives in the RESULT_CACHE_PATH sqlite file, so any worker can
+# answer a poll)
+ANALYSIS_JOB_WORKERS = int(os.environ.get('ANALYSIS_JOB_WORKERS', '2'))
+ANALYSIS_JOB_RETENTION = int(os.environ.get('ANALYSIS_JOB_RETENTION', '3600'))
+# Seconds without an update after which a queued/running job is taken to
+# have died with its worker and is marked failed
+ANALYSIS_JOB_STALE_AFTER = int(os.environ.get('ANALYSIS_JOB_STALE_AFTER', '900'))
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
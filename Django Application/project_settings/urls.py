@@ -1,9 +1,13 @@
 from django.contrib import admin
 from django.urls import path, include
+from ml_app import views as ml_views
 from django.conf import settings
 from django.conf.urls.static import static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('ml_app/', include('ml_app.urls')),
+    # Probes at the root as well, where orchestrators expect them
+    path('healthz', ml_views.healthz),
+    path('readyz', ml_views.readyz),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
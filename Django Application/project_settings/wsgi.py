@@ -1,6 +1,32 @@
+import gc
 import os
+import time
+
+_started = time.perf_counter()
+
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project_settings.settings')
 
 application = get_wsgi_application()
+
+from ml_app.runtime import runtime
+
+runtime.record('django_setup', time.perf_counter() - _started)
+
+if settings.PRELOAD_MODELS:
+    # Needs gunicorn --preload, so this runs once in the master. TensorFlow
+    # is not fork-safe once it has built a model, so the master only maps
+    # the model files; each worker builds its models, detectors and threads
+    # after the fork, without reading the files again
+    from ml_app.models.model_registry import registry
+    registry.preload_artifacts(settings.MODEL_PATHS)
+    # Keep the cyclic GC from touching (and so copying) preloaded objects
+    gc.freeze()
+
+# Never start loading here: under gunicorn --preload this is the master, and
+# neither the loader thread nor TensorFlow would survive the fork. Forked
+# workers start loading in the background straight away; otherwise /readyz
+# or the first request that needs a detector starts it
+os.register_at_fork(after_in_child=runtime.start)
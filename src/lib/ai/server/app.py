@@ -1,10 +1,10 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 import cv2
-import numpy as np
 from predictor import DeepfakePredictor
 import tempfile
 import os
+import shutil
 
 app = FastAPI()
 
@@ -17,43 +17,66 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+COPY_CHUNK_SIZE = 1024 * 1024
+
 # Initialize predictor
 predictor = DeepfakePredictor()
 
+def read_frames(cap, frame_stride=1):
+    """Yield every frame_stride-th frame as RGB; skipped frames are grabbed, not decoded to images."""
+    index = 0
+    while True:
+        if index % frame_stride:
+            if not cap.grab():
+                break
+        else:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            # Convert BGR to RGB
+            yield cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        index += 1
+
+# A plain def: FastAPI runs it in its threadpool, so the upload copy and
+# the (CPU/GPU-bound) analysis don't block the event loop
 @app.post("/analyze")
-async def analyze_video(file: UploadFile = File(...)):
+def analyze_video(
+    file: UploadFile = File(...),
+    frame_stride: int = Query(1, ge=1),
+    window_stride: int = Query(1, ge=1),
+    multi_face: bool = Query(False),
+):
     if not file.filename.lower().endswith(('.mp4', '.avi', '.mov')):
         raise HTTPException(status_code=400, detail="Only video files are allowed")
         
-    # Save uploaded file temporarily
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as temp_file:
-        content = await file.read()
-        temp_file.write(content)
+    # OpenCV needs a named file. Starlette has already spooled the body to
+    # its own temporary file, so copy it across in chunks rather than
+    # reading the whole upload into memory first
+    suffix = os.path.splitext(file.filename)[1].lower()
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
+        file.file.seek(0)
+        shutil.copyfileobj(file.file, temp_file, COPY_CHUNK_SIZE)
         temp_path = temp_file.name
 
     try:
-        # Read video frames
         cap = cv2.VideoCapture(temp_path)
-        frames = []
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            # Convert BGR to RGB
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            frames.append(frame)
-        cap.release()
-
-        if not frames:
+        if not cap.isOpened():
             raise HTTPException(status_code=400, detail="Could not read video file")
 
-        # Analyze frames
+        # Analyze frames as they are decoded; only the current sequence
+        # window is ever held in memory
         try:
-            results = predictor.predict_frames(frames)
+            if multi_face:
+                # Every face, linked into per-identity tracks and scored per track
+                results = predictor.predict_tracks(read_frames(cap, frame_stride), window_stride=window_stride)
+            else:
+                results = predictor.predict_frames(read_frames(cap, frame_stride), window_stride=window_stride)
             return results
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e))
+        finally:
+            cap.release()
             
     finally:
         # Cleanup
-        os.unlink(temp_path)
\ No newline at end of file
+        os.unlink(temp_path)
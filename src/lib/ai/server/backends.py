@@ -0,0 +1,131 @@
+import os
+
+import numpy as np
+import torch
+
+BACKENDS = ('eager', 'torchscript', 'onnx', 'int8_dynamic', 'int8_static')
+
+# Backends whose outputs are only expected to approximate eager fp32
+QUANTIZED_BACKENDS = ('int8_dynamic', 'int8_static')
+
+# Backends that run on CPU regardless of available GPUs
+CPU_ONLY_BACKENDS = ('onnx',) + QUANTIZED_BACKENDS
+
+
+def exported_path(model_path, backend):
+    """Where export_model.py writes the artifact for a backend, next to the checkpoint."""
+    root, _ = os.path.splitext(model_path)
+    if backend == 'torchscript':
+        return root + '.ts.pt'
+    if backend == 'onnx':
+        return root + '.onnx'
+    if backend == 'int8_static':
+        return root + '.int8.ts.pt'
+    return model_path
+
+
+def fold_batchnorm(model):
+    """Fold eval-mode BatchNorm into the preceding Conv using the traced graph.
+
+    Only conv -> batchnorm pairs that actually follow each other in forward()
+    are fused, so this is safe for any checkpoint. Models that can't be
+    symbolically traced are returned unchanged.
+    """
+    from torch.fx.experimental.optimization import fuse
+    try:
+        return fuse(model.eval())
+    except Exception as e:
+        print(f"Skipping BatchNorm folding: {str(e)}")
+        return model
+
+
+def export_torchscript(model, example, path):
+    model = fold_batchnorm(model)
+    with torch.no_grad():
+        traced = torch.jit.trace(model, example)
+        traced = torch.jit.freeze(traced.eval())
+    traced.save(path)
+    return traced
+
+
+def export_onnx(model, example, path, opset=17):
+    model = fold_batchnorm(model)
+    with torch.no_grad():
+        torch.onnx.export(
+            model, example, path,
+            input_names=['input'], output_names=['output'],
+            dynamic_axes={'input': {0: 'batch'}, 'output': {0: 'batch'}},
+            opset_version=opset,
+        )
+
+
+def quantize_dynamic(model):
+    """INT8 weights for every Linear layer, activations quantized on the fly.
+
+    Most of Model's weights sit in fc1 (128*28*28 x 128), so this alone
+    shrinks the checkpoint roughly 4x and speeds up the CPU matmul.
+    """
+    return torch.ao.quantization.quantize_dynamic(model.eval(), {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def quantize_static(model, example, calibration_batches, engine='fbgemm'):
+    """Full INT8 (conv and linear) via FX graph mode, calibrated on real inputs."""
+    import copy
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+    torch.backends.quantized.engine = engine
+    prepared = prepare_fx(copy.deepcopy(model).eval(), get_default_qconfig_mapping(engine), example_inputs=(example,))
+    with torch.no_grad():
+        for batch in calibration_batches:
+            prepared(batch)
+    return convert_fx(prepared)
+
+
+def export_int8_static(model, example, calibration_batches, path):
+    quantized = quantize_static(model, example, calibration_batches)
+    with torch.no_grad():
+        traced = torch.jit.trace(quantized, example)
+        traced = torch.jit.freeze(traced.eval())
+    traced.save(path)
+    return traced
+
+
+class OnnxRuntimeBackend:
+    """Callable like a torch module: tensor in, tensor out, run on ONNX Runtime (CPU)."""
+
+    def __init__(self, path, threads=None):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def eval(self):
+        return self
+
+    def __call__(self, batch):
+        inputs = np.ascontiguousarray(batch.detach().cpu().numpy(), dtype=np.float32)
+        output, = self.session.run(None, {self.input_name: inputs})
+        return torch.from_numpy(output)
+
+
+def load_backend(backend, model_path, device):
+    """Load model_path (or its exported artifact) for the given backend."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend}")
+
+    if backend == 'onnx':
+        # ONNX Runtime here is CPU-only; outputs come back as CPU tensors
+        return OnnxRuntimeBackend(exported_path(model_path, backend))
+    if backend in ('torchscript', 'int8_static'):
+        model = torch.jit.load(exported_path(model_path, backend), map_location=device)
+    elif backend == 'int8_dynamic':
+        # Cheap enough to do at load time, so there is no exported artifact
+        model = quantize_dynamic(torch.load(model_path, map_location='cpu'))
+    else:
+        model = torch.load(model_path, map_location=device)
+    model.eval()
+    return model
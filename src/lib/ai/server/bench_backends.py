@@ -0,0 +1,51 @@
+"""
+Latency and throughput of each inference backend on CPU.
+
+Usage (after export_model.py):
+    python bench_backends.py models/deepfake_detection.pt --input-shape 3 224 224 --batches 1 8 32
+"""
+
+import argparse
+import os
+import time
+
+import torch
+
+from backends import BACKENDS, exported_path, load_backend
+
+
+def bench(model, example, repeat, warmup=3):
+    with torch.no_grad():
+        for _ in range(warmup):
+            model(example)
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            model(example)
+            timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2], timings[int(len(timings) * 0.9)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('checkpoint')
+    parser.add_argument('--input-shape', type=int, nargs='+', required=True)
+    parser.add_argument('--batches', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'backend':>12} {'batch':>6} {'p50 ms':>9} {'p90 ms':>9} {'samples/s':>10}")
+    for backend in BACKENDS:
+        if not os.path.exists(exported_path(args.checkpoint, backend)):
+            print(f"{backend:>12}  (not exported, skipped)")
+            continue
+        model = load_backend(backend, args.checkpoint, 'cpu')
+        for batch in args.batches:
+            example = torch.randn(batch, *args.input_shape)
+            p50, p90 = bench(model, example, args.repeat)
+            print(f"{backend:>12} {batch:>6} {p50 * 1e3:>9.2f} {p90 * 1e3:>9.2f} {batch / p50:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Microbenchmark: per-face preprocessing cost, PIL/torchvision vs FacePreprocessor.
+
+Usage:
+    python bench_preprocessing.py --faces 64 --repeat 20
+"""
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+import torch
+from PIL import Image
+from torchvision import transforms
+
+from preprocessing import FacePreprocessor, IMAGENET_MEAN, IMAGENET_STD, get_face_cascade
+
+# Largest allowed |difference| from the torchvision pipeline, in normalized units
+PARITY_TOLERANCE = 1e-5
+
+
+def random_faces(count, seed=0):
+    # Face crops come in assorted sizes straight out of the Haar cascade
+    rng = np.random.default_rng(seed)
+    sizes = rng.integers(80, 400, size=count)
+    return [rng.integers(0, 256, size=(int(s), int(s), 3), dtype=np.uint8) for s in sizes]
+
+
+def time_per_face(fn, faces, repeat):
+    fn(faces)  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(faces)
+    return (time.perf_counter() - start) / (repeat * len(faces))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--faces', type=int, default=64)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--channels-last', action='store_true')
+    args = parser.parse_args()
+
+    faces = random_faces(args.faces)
+
+    transform = transforms.Compose([
+        transforms.Resize((224, 224)),
+        transforms.ToTensor(),
+        transforms.Normalize(mean=list(IMAGENET_MEAN), std=list(IMAGENET_STD))
+    ])
+
+    def before(group):
+        return torch.stack([transform(Image.fromarray(face)) for face in group])
+
+    preprocessor = FacePreprocessor(size=(224, 224), channels_last=args.channels_last)
+
+    def after_single(group):
+        return torch.cat([preprocessor([face]) for face in group])
+
+    old = time_per_face(before, faces, args.repeat)
+    single = time_per_face(after_single, faces, args.repeat)
+    batched = time_per_face(preprocessor, faces, args.repeat)
+
+    diff = (before(faces) - preprocessor(faces)).abs()
+    print(f"{'path':>28} {'us/face':>10} {'speedup':>8}")
+    print(f"{'PIL + torchvision':>28} {old * 1e6:>10.1f} {1.0:>8.2f}")
+    print(f"{'FacePreprocessor (1 face)':>28} {single * 1e6:>10.1f} {old / single:>8.2f}")
+    print(f"{'FacePreprocessor (batched)':>28} {batched * 1e6:>10.1f} {old / batched:>8.2f}")
+    print(f"max |diff| vs torchvision: {diff.max().item():.2e}, mean: {diff.mean().item():.2e}")
+    # Same PIL resize, so only float rounding in the normalization may differ
+    assert diff.max().item() <= PARITY_TOLERANCE, "FacePreprocessor no longer matches the torchvision pipeline"
+
+    # Cascade construction, which extract_faces used to pay on every frame
+    start = time.perf_counter()
+    cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+    load = time.perf_counter() - start
+    get_face_cascade()
+    start = time.perf_counter()
+    get_face_cascade()
+    cached = time.perf_counter() - start
+    print(f"Haar cascade per frame: {load * 1e3:.2f} ms loaded vs {cached * 1e6:.2f} us cached")
+
+
+if __name__ == '__main__':
+    main()
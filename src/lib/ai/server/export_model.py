@@ -0,0 +1,124 @@
+"""
+Export a checkpoint for the torchscript/onnx/int8 inference backends and check parity.
+
+Usage:
+    python export_model.py models/deepfake_detection.pt --input-shape 3 224 224
+    python export_model.py models/model_20_frames.pt --input-shape 20 3 224 224
+    python export_model.py --random-init --input-shape 3 224 224 --out models/model_check.pt
+    python export_model.py models/deepfake_detection.pt --input-shape 3 224 224 \
+        --formats int8_dynamic int8_static --calibration-dir data/faces
+
+The exported files are written next to the checkpoint (see
+backends.exported_path). After export, every backend is run on the same
+batch. Float backends must match eager PyTorch within --atol or the
+script exits non-zero. INT8 backends get an accuracy-delta report
+instead: probability error and how often the REAL/FAKE decision flips.
+"""
+
+import argparse
+import os
+import sys
+
+import cv2
+import torch
+
+from backends import (
+    BACKENDS, QUANTIZED_BACKENDS, export_int8_static, export_onnx, export_torchscript, exported_path, load_backend,
+)
+from preprocessing import FacePreprocessor
+
+
+def load_checkpoint(args):
+    if args.random_init:
+        # Fresh Model from src/lib/ai/models, handy for checking the toolchain
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'models'))
+        from model import Model
+        model = Model().eval()
+        torch.save(model, args.out)
+        return model, args.out
+    return torch.load(args.checkpoint, map_location='cpu').eval(), args.checkpoint
+
+
+def calibration_batches(args, batch_size=16):
+    """Real face crops from --calibration-dir, or random inputs as a last resort."""
+    if args.calibration_dir and len(args.input_shape) == 3:
+        preprocessor = FacePreprocessor(size=tuple(args.input_shape[:0:-1]))
+        paths = sorted(
+            os.path.join(root, name)
+            for root, _, names in os.walk(args.calibration_dir)
+            for name in names if name.lower().endswith(('.jpg', '.jpeg', '.png'))
+        )[:args.calibration_size]
+        images = (cv2.imread(path) for path in paths)
+        faces = [cv2.cvtColor(image, cv2.COLOR_BGR2RGB) for image in images if image is not None]
+        if faces:
+            print(f"Calibrating on {len(faces)} images from {args.calibration_dir}")
+            return [preprocessor(faces[i:i + batch_size]) for i in range(0, len(faces), batch_size)]
+
+    print("WARNING: calibrating on random inputs; pass --calibration-dir with real face crops")
+    torch.manual_seed(1)
+    return [torch.randn(batch_size, *args.input_shape) for _ in range(max(1, args.calibration_size // batch_size))]
+
+
+def check_parity(model_path, example, atol, backends):
+    with torch.no_grad():
+        reference = load_backend('eager', model_path, 'cpu')(example).float()
+        ok = True
+        for backend in backends:
+            output = load_backend(backend, model_path, 'cpu')(example).float()
+            diff = (output - reference).abs()
+            if backend in QUANTIZED_BACKENDS:
+                # Accuracy-delta report vs fp32: outputs are probabilities
+                flips = ((output > 0.5) != (reference > 0.5)).float().mean().item()
+                print(f"{backend:>12}: max |dp| = {diff.max().item():.4f}, mean |dp| = {diff.mean().item():.4f}, "
+                      f"decision flips = {flips * 100:.2f}%")
+                continue
+            status = 'ok' if diff.max().item() <= atol else 'MISMATCH'
+            ok = ok and status == 'ok'
+            print(f"{backend:>12}: max |diff| vs eager = {diff.max().item():.2e} ({status})")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('checkpoint', nargs='?')
+    parser.add_argument('--input-shape', type=int, nargs='+', required=True,
+                        help="per-sample input shape, without the batch dimension")
+    parser.add_argument('--batch', type=int, default=4)
+    parser.add_argument('--formats', nargs='+', choices=BACKENDS[1:], default=list(BACKENDS[1:]))
+    parser.add_argument('--atol', type=float, default=1e-4)
+    parser.add_argument('--calibration-dir', help="face crops used to calibrate/evaluate int8_static")
+    parser.add_argument('--calibration-size', type=int, default=256)
+    parser.add_argument('--random-init', action='store_true')
+    parser.add_argument('--out', default='models/model_check.pt')
+    args = parser.parse_args()
+    if not args.checkpoint and not args.random_init:
+        parser.error("a checkpoint is required unless --random-init is given")
+
+    model, model_path = load_checkpoint(args)
+    torch.manual_seed(0)
+    example = torch.randn(args.batch, *args.input_shape)
+
+    if 'torchscript' in args.formats:
+        export_torchscript(model, example, exported_path(model_path, 'torchscript'))
+        print(f"Wrote {exported_path(model_path, 'torchscript')}")
+    if 'onnx' in args.formats:
+        export_onnx(model, example, exported_path(model_path, 'onnx'))
+        print(f"Wrote {exported_path(model_path, 'onnx')}")
+    calibration = None
+    if 'int8_static' in args.formats:
+        calibration = calibration_batches(args)
+        export_int8_static(model, example, calibration, exported_path(model_path, 'int8_static'))
+        print(f"Wrote {exported_path(model_path, 'int8_static')}")
+
+    # Different batch size than the export example, to exercise dynamic
+    # shapes; real faces when we have them, so the int8 report is meaningful
+    if calibration is not None and args.calibration_dir:
+        parity_example = torch.cat(calibration)
+    else:
+        parity_example = torch.randn(args.batch + 1, *args.input_shape)
+    if not check_parity(model_path, parity_example, args.atol, args.formats):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
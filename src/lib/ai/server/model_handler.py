@@ -1,29 +1,26 @@
+import os
 import torch
-import torchvision.transforms as transforms
-from PIL import Image
-import numpy as np
+from preprocessing import FacePreprocessor
+from backends import CPU_ONLY_BACKENDS, load_backend
 
 class DeepfakeDetector:
-    def __init__(self, model_path='models/deepfake_detection.pt'):
-        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-        self.model = torch.load(model_path, map_location=self.device)
-        self.model.eval()
+    def __init__(self, model_path='models/deepfake_detection.pt', batch_size=32, channels_last=False, backend=None):
+        # eager, torchscript, onnx, int8_dynamic or int8_static (see
+        # export_model.py); INFERENCE_BACKEND picks it
+        self.backend = backend or os.environ.get('INFERENCE_BACKEND', 'eager')
+        use_cuda = torch.cuda.is_available() and self.backend not in CPU_ONLY_BACKENDS
+        self.device = torch.device('cuda' if use_cuda else 'cpu')
+        self.model = load_backend(self.backend, model_path, self.device)
+        # Frames scored per forward pass in analyze_video_frames
+        self.batch_size = batch_size
+        if channels_last and self.backend == 'eager':
+            self.model = self.model.to(memory_format=torch.channels_last)
         
-        self.transform = transforms.Compose([
-            transforms.Resize((224, 224)),
-            transforms.ToTensor(),
-            transforms.Normalize(mean=[0.485, 0.456, 0.406], 
-                              std=[0.229, 0.224, 0.225])
-        ])
+        self.preprocessor = FacePreprocessor(size=(224, 224), device=self.device, channels_last=channels_last)
 
     def preprocess_frame(self, frame):
-        # Convert numpy array to PIL Image
-        frame = Image.fromarray(frame)
-        # Apply transformations
-        frame = self.transform(frame)
-        # Add batch dimension
-        frame = frame.unsqueeze(0)
-        return frame.to(self.device)
+        # Already has a batch dimension
+        return self.preprocessor([frame])
 
     @torch.no_grad()
     def analyze_frame(self, frame):
@@ -41,12 +38,19 @@ class DeepfakeDetector:
             'confidence': float(probability * 100)
         }
 
+    @torch.no_grad()
     def analyze_video_frames(self, frames):
         results = []
-        for i, frame in enumerate(frames):
-            result = self.analyze_frame(frame)
-            result['timestamp'] = i / len(frames)  # Normalized timestamp
-            results.append(result)
+        for start in range(0, len(frames), self.batch_size):
+            # Resize and normalize the whole group in one vectorized step
+            batch = self.preprocessor(frames[start:start + self.batch_size])
+            probabilities = torch.sigmoid(self.model(batch)).reshape(len(batch), -1)[:, 0]
+            for offset, probability in enumerate(probabilities.tolist()):
+                results.append({
+                    'isFake': probability > 0.5,
+                    'confidence': float(probability * 100),
+                    'timestamp': (start + offset) / len(frames)  # Normalized timestamp
+                })
             
         # Calculate overall result
         fake_frames = sum(1 for r in results if r['isFake'])
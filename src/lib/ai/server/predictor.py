@@ -1,67 +1,198 @@
 import cv2
-import numpy as np
 import torch
-from torchvision import transforms
-from PIL import Image
 import os
+import shared_code  # noqa: F401  (makes ml_app importable)
+from ml_app.models.face_tracker import FaceTracker
+from ml_app.models.identity_tracks import TrackLinker
+from sequence_windows import SequenceWindowBuffer
+from preprocessing import FacePreprocessor, get_face_cascade
+from backends import CPU_ONLY_BACKENDS, load_backend
 
 class DeepfakePredictor:
-    def __init__(self, model_path='models/model_20_frames.pt'):
-        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-        self.model = torch.load(model_path, map_location=self.device)
-        self.model.eval()
+    def __init__(self, model_path='models/model_20_frames.pt', track_interval=None, window_batch_size=8, backend=None):
+        # Full Haar detection every track_interval frames; the face box is
+        # carried forward by template matching in between. 1 (the default,
+        # as in the Django app) detects on every frame; FACE_TRACK_INTERVAL
+        # sets it
+        self.track_interval = track_interval or int(os.environ.get('FACE_TRACK_INTERVAL', '1'))
+        # Overlapping sequence windows sent to the model per forward pass
+        self.window_batch_size = window_batch_size
+        # eager, torchscript, onnx, int8_dynamic or int8_static (see
+        # export_model.py); INFERENCE_BACKEND picks it
+        self.backend = backend or os.environ.get('INFERENCE_BACKEND', 'eager')
+        use_cuda = torch.cuda.is_available() and self.backend not in CPU_ONLY_BACKENDS
+        self.device = torch.device('cuda' if use_cuda else 'cpu')
+        self.model = load_backend(self.backend, model_path, self.device)
         
-        self.transform = transforms.Compose([
-            transforms.Resize((224, 224)),
-            transforms.ToTensor(),
-            transforms.Normalize(mean=[0.485, 0.456, 0.406], 
-                              std=[0.229, 0.224, 0.225])
-        ])
-
-    def extract_faces(self, frame):
-        face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        self.preprocessor = FacePreprocessor(size=(224, 224), device=self.device)
+
+    def extract_faces(self, frame, tracker=None):
+        if tracker is not None:
+            tracked = tracker.track(frame)
+            if tracked is not None:
+                x, y, w, h = tracked[0]
+                return frame[y:y+h, x:x+w]
+
+        face_cascade = get_face_cascade()
         gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
         faces = face_cascade.detectMultiScale(gray, 1.3, 5)
         
         if len(faces) == 0:
+            if tracker is not None:
+                tracker.update(frame, None)
             return None
             
         x, y, w, h = faces[0]  # Take the first face
+        if tracker is not None:
+            tracker.update(frame, (x, y, w, h))
         face = frame[y:y+h, x:x+w]
         return face
 
+    def detect_all_faces(self, frame, min_side=40):
+        """Every Haar detection at least min_side pixels wide, as (x, y, w, h) boxes."""
+        gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+        faces = get_face_cascade().detectMultiScale(gray, 1.3, 5, minSize=(min_side, min_side))
+        return [tuple(int(v) for v in face) for face in faces]
+
     def preprocess_frame(self, frame):
-        # Convert to PIL Image
-        frame = Image.fromarray(frame)
-        # Apply transformations
-        frame = self.transform(frame)
-        return frame
+        return self.preprocessor([frame])[0]
+
+    def _predict_windows(self, windows):
+        results = []
+        for start in range(0, len(windows), self.window_batch_size):
+            batch = windows[start:start + self.window_batch_size]
+            output = self.model(batch.contiguous())
+            for probability in output.reshape(len(batch), -1)[:, 0].tolist():
+                results.append({
+                    'isFake': probability > 0.5,
+                    'confidence': float(probability * 100)
+                })
+        return results
+
+    def _flush_tracks(self, buffers, pending, track_results):
+        # One forward pass for the ready windows of every track, then the
+        # buffers may be compacted (the windows are views into them)
+        if not pending:
+            return
+        results = self._predict_windows(torch.cat([windows for _, windows in pending]))
+        offset = 0
+        for track_id, windows in pending:
+            track_results.setdefault(track_id, []).extend(results[offset:offset + len(windows)])
+            offset += len(windows)
+            if track_id in buffers:
+                buffers[track_id].compact()
+        pending.clear()
 
     @torch.no_grad()
-    def predict_frames(self, frames, sequence_length=20):
-        processed_frames = []
+    def predict_tracks(self, frames, sequence_length=20, window_stride=1, min_face_side=40):
+        """Multi-face mode: every face gets its own sequence windows, scored per identity track."""
+        linker = TrackLinker()
+        buffers = {}
+        track_results = {}
+        track_frames = {}
+        pending = []
+
+        for index, frame in enumerate(frames):
+            boxes = self.detect_all_faces(frame, min_face_side)
+            if not boxes:
+                continue
+            track_ids, closed = linker.link(index, boxes)
+
+            # A closed track gets no more faces: score what it has and free it
+            for track_id in closed:
+                buffer = buffers.pop(track_id, None)
+                ready = buffer.ready() if buffer is not None else None
+                if ready is not None:
+                    pending.append((track_id, ready))
+            self._flush_tracks(buffers, pending, track_results)
+
+            # Every face in the frame is resized and normalized in one call
+            processed = self.preprocessor([frame[y:y+h, x:x+w] for x, y, w, h in boxes])
+            for track_id, face in zip(track_ids, processed):
+                if track_id not in buffers:
+                    buffers[track_id] = SequenceWindowBuffer(
+                        sequence_length, face.shape,
+                        batch_size=self.window_batch_size, window_stride=window_stride, device=self.device,
+                    )
+                buffers[track_id].append(face)
+                track_frames.setdefault(track_id, []).append(index)
+                if buffers[track_id].full():
+                    ready = buffers[track_id].ready()
+                    if ready is not None:
+                        pending.append((track_id, ready))
+                    else:
+                        buffers[track_id].compact()
+            self._flush_tracks(buffers, pending, track_results)
+
+        for track_id, buffer in buffers.items():
+            ready = buffer.ready()
+            if ready is not None:
+                pending.append((track_id, ready))
+        self._flush_tracks(buffers, pending, track_results)
+
+        if not track_results:
+            raise ValueError('No face was tracked for a full sequence')
+
+        tracks = []
+        for track_id, results in sorted(track_results.items()):
+            fake_ratio = sum(1 for r in results if r['isFake']) / len(results)
+            tracks.append({
+                'trackId': track_id,
+                'isFake': fake_ratio > 0.3,
+                'confidence': sum(r['confidence'] for r in results) / len(results),
+                'fakeRatio': fake_ratio,
+                'frameIndices': track_frames[track_id],
+                'frames': results,
+            })
+
+        # The video is fake if any identity is
+        fake_tracks = [t for t in tracks if t['isFake']]
+        deciding = fake_tracks or tracks
+        return {
+            'overall': {
+                'isFake': bool(fake_tracks),
+                'confidence': max(t['confidence'] for t in deciding) if fake_tracks
+                else sum(t['confidence'] for t in deciding) / len(deciding),
+            },
+            'frames': [r for t in tracks for r in t['frames']],
+            'tracks': tracks,
+        }
+
+    @torch.no_grad()
+    def predict_frames(self, frames, sequence_length=20, window_stride=1):
+        # frames may be any iterable (e.g. a generator over a VideoCapture);
+        # it is consumed once and each face is preprocessed exactly once into
+        # a fixed-size window buffer
+        windows = None
         frame_results = []
+        # Frames here are RGB; the shared FaceTracker defaults to BGR
+        tracker = (FaceTracker(redetect_interval=self.track_interval, gray_conversion=cv2.COLOR_RGB2GRAY)
+                   if self.track_interval > 1 else None)
         
         for frame in frames:
-            face = self.extract_faces(frame)
-            if face is not None:
-                processed_frame = self.preprocess_frame(face)
-                processed_frames.append(processed_frame)
-                
-                if len(processed_frames) == sequence_length:
-                    # Stack frames and predict
-                    sequence = torch.stack(processed_frames).unsqueeze(0)
-                    output = self.model(sequence.to(self.device))
-                    probability = output.item()
-                    
-                    result = {
-                        'isFake': probability > 0.5,
-                        'confidence': float(probability * 100)
-                    }
-                    frame_results.append(result)
-                    
-                    # Reset for next sequence
-                    processed_frames = processed_frames[1:]
+            face = self.extract_faces(frame, tracker)
+            if face is None:
+                continue
+
+            processed_frame = self.preprocess_frame(face)
+            if windows is None:
+                windows = SequenceWindowBuffer(
+                    sequence_length, processed_frame.shape,
+                    batch_size=self.window_batch_size, window_stride=window_stride, device=self.device,
+                )
+            windows.append(processed_frame)
+
+            if windows.full():
+                # A full buffer holds a whole batch of overlapping windows
+                ready = windows.ready()
+                if ready is not None:
+                    frame_results.extend(self._predict_windows(ready))
+                windows.compact()
+
+        if windows is not None:
+            ready = windows.ready()
+            if ready is not None:
+                frame_results.extend(self._predict_windows(ready))
         
         if not frame_results:
             raise ValueError('No faces detected in video')
@@ -76,4 +207,4 @@ class DeepfakePredictor:
                 'confidence': overall_confidence
             },
             'frames': frame_results
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,67 @@
+import threading
+
+import cv2
+import numpy as np
+import torch
+from PIL import Image
+
+IMAGENET_MEAN = (0.485, 0.456, 0.406)
+IMAGENET_STD = (0.229, 0.224, 0.225)
+
+_local = threading.local()
+
+
+def get_face_cascade():
+    """Haar face cascade, loaded once per thread (CascadeClassifier isn't thread-safe)."""
+    cascade = getattr(_local, 'face_cascade', None)
+    if cascade is None:
+        cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        _local.face_cascade = cascade
+    return cascade
+
+
+class FacePreprocessor:
+    """Resize and normalize a group of RGB faces into one model-ready tensor.
+
+    Faces are resized into a reusable uint8 staging array, then converted,
+    moved to the device and normalized in a single tensor operation instead
+    of a per-face ToTensor/Normalize round-trip. The resize is PIL's
+    bilinear one, exactly what transforms.Resize does on a PIL image, so
+    the model sees the same inputs as with the torchvision pipeline
+    (bench_preprocessing.py checks this). With
+    ``channels_last`` the result uses torch.channels_last memory format.
+    Each thread gets its own staging array, so one instance can serve
+    concurrent requests.
+    """
+
+    def __init__(self, size=(224, 224), mean=IMAGENET_MEAN, std=IMAGENET_STD, device='cpu', channels_last=False):
+        self.size = size
+        self.device = torch.device(device)
+        self.channels_last = channels_last
+        # Fold /255 into the scale so normalization is one multiply-add
+        self.scale = (1.0 / (255.0 * torch.tensor(std))).view(1, 3, 1, 1).to(self.device)
+        self.shift = (-torch.tensor(mean) / torch.tensor(std)).view(1, 3, 1, 1).to(self.device)
+        self._local = threading.local()
+
+    def _resize_into(self, face, out):
+        # PIL's antialiased bilinear; cv2.resize (INTER_AREA/LINEAR) gives
+        # visibly different pixels, i.e. different model inputs
+        out[...] = np.asarray(Image.fromarray(face).resize(self.size, Image.BILINEAR))
+
+    def __call__(self, faces):
+        """faces: sequence of HxWx3 RGB uint8 arrays -> float tensor (N, 3, H, W)."""
+        count = len(faces)
+        staging = getattr(self._local, 'staging', None)
+        if staging is None or len(staging) < count:
+            staging = np.empty((count, self.size[1], self.size[0], 3), dtype=np.uint8)
+            self._local.staging = staging
+        staging = staging[:count]
+        for face, out in zip(faces, staging):
+            self._resize_into(face, out)
+
+        batch = torch.from_numpy(staging).to(self.device, non_blocking=True)
+        batch = batch.permute(0, 3, 1, 2).float()
+        batch = batch.mul_(self.scale).add_(self.shift)
+        if self.channels_last:
+            return batch.contiguous(memory_format=torch.channels_last)
+        return batch.contiguous()
@@ -0,0 +1,61 @@
+import torch
+
+
+class SequenceWindowBuffer:
+    """Preallocated frame buffer that hands out overlapping windows as strided views.
+
+    Each preprocessed face is written into the buffer exactly once. The
+    windows are torch.as_strided views over that storage, so nothing is
+    re-stacked per window. Windows start every ``window_stride`` faces,
+    and ``ready()`` returns them in groups of up to ``batch_size`` so the
+    model sees one forward pass per batch.
+    """
+
+    def __init__(self, sequence_length, frame_shape, batch_size=8, window_stride=1, device='cpu', dtype=torch.float32):
+        self.sequence_length = sequence_length
+        self.window_stride = window_stride
+        self.batch_size = batch_size
+        # Enough room for one full batch of windows past the first one
+        self.capacity = sequence_length + max(batch_size - 1, 1) * window_stride
+        self.buffer = torch.empty((self.capacity,) + tuple(frame_shape), device=device, dtype=dtype)
+        self.count = 0          # faces currently held in the buffer
+        self.next_start = 0     # buffer position where the next window starts
+
+    def append(self, frame):
+        self.buffer[self.count].copy_(frame)
+        self.count += 1
+
+    def full(self):
+        return self.count == self.capacity
+
+    def _available(self):
+        if self.count < self.next_start + self.sequence_length:
+            return 0
+        return (self.count - self.next_start - self.sequence_length) // self.window_stride + 1
+
+    def ready(self):
+        """Strided view of every complete window not yet returned, shape (n, seq, *frame_shape)."""
+        n = self._available()
+        if n == 0:
+            return None
+
+        frame_stride = self.buffer.stride(0)
+        windows = self.buffer.as_strided(
+            (n, self.sequence_length) + tuple(self.buffer.shape[1:]),
+            (self.window_stride * frame_stride,) + tuple(self.buffer.stride()),
+            self.buffer.storage_offset() + self.next_start * frame_stride,
+        )
+        self.next_start += n * self.window_stride
+        return windows
+
+    def compact(self):
+        """Move the faces still needed by future windows to the front of the buffer."""
+        keep = self.count - self.next_start
+        if keep > 0:
+            # clone: source and destination ranges may overlap
+            self.buffer[:keep].copy_(self.buffer[self.next_start:self.count].clone())
+            self.count, self.next_start = keep, 0
+        else:
+            # With window_stride > 1 the next window may start on a face that
+            # hasn't arrived yet; those positions are simply skipped
+            self.count, self.next_start = 0, -keep
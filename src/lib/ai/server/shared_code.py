@@ -0,0 +1,19 @@
+"""
+Puts the Django app on sys.path so the server can import its framework-free
+helpers (ml_app.models.face_tracker, identity_tracks, detection_scaling)
+instead of keeping copies. Those modules only need OpenCV and numpy.
+
+DJANGO_APP_DIR overrides the location when the server is deployed without
+the rest of the repository next to it.
+"""
+
+import os
+import sys
+
+DJANGO_APP_DIR = os.environ.get(
+    'DJANGO_APP_DIR',
+    os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', 'Django Application')),
+)
+
+if DJANGO_APP_DIR not in sys.path:
+    sys.path.append(DJANGO_APP_DIR)
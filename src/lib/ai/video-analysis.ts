@@ -1,3 +1,5 @@
+import { config } from "@/lib/config";
+
 interface FrameAnalysisResult {
   isFake: boolean;
   confidence: number;
@@ -12,22 +14,65 @@ interface VideoAnalysisResult {
   frames: FrameAnalysisResult[];
 }
 
+interface JobStageProgress {
+  done: number;
+  total: number | null;
+}
+
+interface AnalysisJob {
+  job_id: string;
+  status: "queued" | "running" | "completed" | "failed";
+  progress: Record<string, JobStageProgress>;
+  result?: {
+    result: "REAL" | "FAKE";
+    confidence: number;
+    frame_predictions: [boolean, number][];
+  };
+  error?: string;
+}
+
+// Backend job stages mapped to the stages the UI shows
+const JOB_STAGES: Record<string, string> = {
+  frames_decoded: "extract_frames",
+  faces_detected: "detect_faces",
+  batches_inferred: "analyze",
+};
+
 export class VideoAnalyzer {
-  private API_URL = "http://127.0.0.1:8000";
+  private POLL_INTERVAL_MS = 500;
 
   constructor() {
     // Initialize any required resources
   }
 
-  private async checkModelStatus(): Promise<boolean> {
-    try {
-      const response = await fetch(`${this.API_URL}/status`);
-      return response.ok;
-    } catch {
-      return false;
+  private reportProgress(
+    job: AnalysisJob,
+    onProgress?: (stage: string, progress: number) => void,
+  ) {
+    for (const [jobStage, stage] of Object.entries(JOB_STAGES)) {
+      const progress = job.progress[jobStage];
+      if (progress?.total) {
+        onProgress?.(stage, Math.min(100, (progress.done / progress.total) * 100));
+      }
     }
   }
 
+  private toAnalysisResult(job: AnalysisJob): VideoAnalysisResult {
+    const result = job.result!;
+    const predictions = result.frame_predictions;
+    return {
+      overall: {
+        isFake: result.result === "FAKE",
+        confidence: result.confidence,
+      },
+      frames: predictions.map(([isFake, confidence], i) => ({
+        isFake,
+        confidence,
+        timestamp: i / predictions.length, // Normalized timestamp
+      })),
+    };
+  }
+
   private async sendVideoForAnalysis(
     file: File,
     onProgress?: (stage: string, progress: number) => void,
@@ -37,43 +82,38 @@ export class VideoAnalyzer {
       throw new Error("Please upload a video file");
     }
 
-    // Check if model is ready
-    const isModelReady = await this.checkModelStatus();
-    if (!isModelReady) {
-      throw new Error("Model server is not ready");
-    }
-
     const formData = new FormData();
     formData.append("file", file);
 
-    const response = await fetch(`${this.API_URL}/analyze`, {
+    // The server queues the analysis and answers right away with a job id
+    const response = await fetch(config.endpoints.videoJobs, {
       method: "POST",
       body: formData,
     });
 
     if (!response.ok) {
       const error = await response.json();
-      throw new Error(error.detail || "Analysis failed");
+      throw new Error(error.error || "Analysis failed");
     }
 
-    // Start progress simulation for different stages
-    let progress = 0;
-    const updateProgress = setInterval(() => {
-      progress += 2;
-      if (progress <= 30) {
-        onProgress?.("extract_frames", progress * 3.33);
-      } else if (progress <= 60) {
-        onProgress?.("detect_faces", (progress - 30) * 3.33);
-      } else if (progress <= 90) {
-        onProgress?.("analyze", (progress - 60) * 3.33);
-      } else {
-        clearInterval(updateProgress);
+    let job: AnalysisJob = await response.json();
+    while (job.status === "queued" || job.status === "running") {
+      this.reportProgress(job, onProgress);
+      await new Promise((resolve) => setTimeout(resolve, this.POLL_INTERVAL_MS));
+
+      const poll = await fetch(`${config.endpoints.jobs}${job.job_id}/`);
+      if (!poll.ok) {
+        throw new Error("Lost track of the analysis job");
       }
-    }, 100);
+      job = await poll.json();
+    }
+
+    if (job.status === "failed") {
+      throw new Error(job.error || "Analysis failed");
+    }
 
-    const result = await response.json();
-    clearInterval(updateProgress);
-    return result;
+    this.reportProgress(job, onProgress);
+    return this.toAnalysisResult(job);
   }
 
   public async analyzeVideo(
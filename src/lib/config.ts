@@ -3,5 +3,7 @@ export const config = {
   endpoints: {
     video: "http://127.0.0.1:8000/ml_app/api/analyze/",
     image: "http://127.0.0.1:8000/ml_app/api/analyze-image/",
+    videoJobs: "http://127.0.0.1:8000/ml_app/api/jobs/video/",
+    jobs: "http://127.0.0.1:8000/ml_app/api/jobs/",
   },
 };